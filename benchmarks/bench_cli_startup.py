@@ -0,0 +1,53 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["numpy", "pandas", "pysam"]
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(cmd, repeat=20):
+
+    """run a command several times and return the wall times in seconds"""
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=REPO_DIR)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def heavy_modules_loaded(argv):
+
+    """list the heavy modules imported by the CLI for the given arguments"""
+
+    code = (
+        "import contextlib, io, sys\n"
+        "from variant_tools import cli\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        f"        cli.main({argv!r})\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=REPO_DIR
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+if __name__ == "__main__":
+    baseline = time_command([sys.executable, "-c", "pass"])
+    cli_help = time_command([sys.executable, "-m", "variant_tools.cli", "--help"])
+
+    print(f"python startup:        {statistics.median(baseline) * 1000:.1f} ms (median)")
+    print(f"variant-tools --help:  {statistics.median(cli_help) * 1000:.1f} ms (median)")
+    print(f"import overhead:       {(statistics.median(cli_help) - statistics.median(baseline)) * 1000:.1f} ms")
+
+    for argv in (["--help"], ["mutate", "--help"], ["compare", "--help"], ["flag-lowconf", "--help"]):
+        loaded = heavy_modules_loaded(argv)
+        print(f"{' '.join(argv):<22} heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+
+import pytest
+
+pysam = pytest.importorskip("pysam")
+
+from variant_tools.part_2 import annotate_low_confident_variant as annotate
+
+REFERENCE = list("ACGT" * 50)
+REFERENCE[139] = "T"
+REFERENCE[169:171] = "AC"
+REFERENCE = "".join(REFERENCE)
+
+FLAGGED_CSV = """CHROM,POS,REF,ALT,QUAL,GT_bcf,GT_snippy,Reason
+chr1,20,{snp_ref},G,10,1/1,1/1,Low QUAL
+chr1,60,{ins_ref},{ins_ref}G,10,1/1,1/1,Low QUAL
+chr1,100,{del_ref},{del_alt},10,1/1,./.,Genotype mismatch
+chr1,140,T,TG,A,10,1/1,2/2,Genotype mismatch
+chr1,170,AC,GT,10,1/1,1/1,Low QUAL
+chr1,195,A,C,10,1/1,1/1,Low QUAL
+"""
+
+
+def make_read(name, start, sequence, cigar, reverse=False, mapq=60):
+    read = pysam.AlignedSegment()
+    read.query_name = name
+    read.reference_id = 0
+    read.reference_start = start
+    read.query_sequence = sequence
+    read.cigarstring = cigar
+    read.mapping_quality = mapq
+    read.query_qualities = pysam.qualitystring_to_array("I" * len(sequence))
+    read.is_reverse = reverse
+    return read
+
+
+def with_base(start, end, pos, base):
+    return REFERENCE[start:pos] + base + REFERENCE[pos + 1:end]
+
+
+@pytest.fixture
+def flagged(tmp_path):
+    reads = [
+        # SNP at 1-based 20: three ALT forward, one ALT reverse, two REF
+        make_read("snp_alt_1", 10, with_base(10, 30, 19, "G"), "20M"),
+        make_read("snp_alt_2", 10, with_base(10, 30, 19, "G"), "20M"),
+        make_read("snp_alt_3", 10, with_base(10, 30, 19, "G"), "20M"),
+        make_read("snp_alt_4", 10, with_base(10, 30, 19, "G"), "20M", reverse=True),
+        make_read("snp_ref_1", 10, REFERENCE[10:30], "20M", mapq=20),
+        make_read("snp_ref_2", 10, REFERENCE[10:30], "20M", reverse=True, mapq=20),
+        # insertion of G after 1-based 60
+        make_read("ins_alt", 40, REFERENCE[40:60] + "G" + REFERENCE[60:70], "20M1I10M", reverse=True),
+        make_read("ins_ref", 40, REFERENCE[40:70], "30M"),
+        # deletion of two bases after 1-based 100
+        make_read("del_alt", 80, REFERENCE[80:100] + REFERENCE[102:112], "20M2D10M"),
+        make_read("del_ref", 80, REFERENCE[80:112], "32M"),
+        # multi-allelic T -> TG,A at 1-based 140
+        make_read("multi_ins", 120, REFERENCE[120:140] + "G" + REFERENCE[140:150], "20M1I10M"),
+        make_read("multi_snp", 120, with_base(120, 150, 139, "A"), "30M", reverse=True),
+        make_read("multi_ref", 120, REFERENCE[120:150], "30M"),
+        # MNP AC -> GT at 1-based 170, only the full GT counts as ALT
+        make_read("mnp_alt", 160, REFERENCE[160:169] + "GT" + REFERENCE[171:180], "20M"),
+        make_read("mnp_half", 160, REFERENCE[160:169] + "GC" + REFERENCE[171:180], "20M"),
+        make_read("mnp_ref", 160, REFERENCE[160:180], "20M"),
+    ]
+
+    header = {"HD": {"VN": "1.6", "SO": "coordinate"}, "SQ": [{"SN": "chr1", "LN": len(REFERENCE)}]}
+    bam_file = str(tmp_path / "reads.bam")
+    with pysam.AlignmentFile(bam_file, "wb", header=header) as bam:
+        for read in sorted(reads, key=lambda r: r.reference_start):
+            bam.write(read)
+    pysam.index(bam_file)
+
+    input_csv = tmp_path / "flagged.csv"
+    input_csv.write_text(FLAGGED_CSV.format(
+        snp_ref=REFERENCE[19], ins_ref=REFERENCE[59], del_ref=REFERENCE[99:102], del_alt=REFERENCE[99]
+    ))
+    return str(input_csv), bam_file, tmp_path
+
+
+def read_evidence(output_csv):
+    with open(output_csv, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return {(row[1], row[3]): dict(zip(header, row)) for row in reader}
+
+
+def test_evidence_counts(flagged):
+    input_csv, bam_file, tmp_path = flagged
+    output_csv = str(tmp_path / "evidence.csv")
+    annotate.annotate_low_confident_variant(input_csv, bam_file, output_csv, threads=1)
+    rows = read_evidence(output_csv)
+
+    def counts(pos, alt):
+        row = rows[(pos, alt)]
+        return tuple(row[column] for column in ["DEPTH", "REF_COUNT", "ALT_COUNT", "ALT_FWD", "ALT_REV"])
+
+    assert counts("20", "G") == ("6", "2", "4", "3", "1")
+    assert rows[("20", "G")]["STRAND_BALANCE"] == "0.25"
+    assert rows[("20", "G")]["MEAN_MAPQ"] == "46.67"
+
+    assert counts("60", REFERENCE[59] + "G") == ("2", "1", "1", "0", "1")
+    assert counts("100", REFERENCE[99]) == ("2", "1", "1", "1", "0")
+    # the multi-allelic ALT is re-joined from the unquoted csv, both alleles count
+    assert rows[("140", "TG,A")]["Reason"] == "Genotype mismatch"
+    assert counts("140", "TG,A") == ("3", "1", "2", "1", "1")
+    # a read matching only the first MNP base is neither REF nor ALT
+    assert counts("170", "GT") == ("3", "1", "1", "1", "0")
+
+    assert counts("195", "C") == ("0", "0", "0", "0", "0")
+    assert rows[("195", "C")]["STRAND_BALANCE"] == "" and rows[("195", "C")]["MEAN_MAPQ"] == ""
+
+
+def test_second_run_is_served_from_cache(flagged, monkeypatch):
+    input_csv, bam_file, tmp_path = flagged
+    cache_file = str(tmp_path / "cache.json")
+
+    first = annotate.annotate_low_confident_variant(
+        input_csv, bam_file, str(tmp_path / "first.csv"), threads=1, cache_file=cache_file)
+
+    def no_pileup(*args):
+        raise AssertionError("pileup_region called for cached sites")
+
+    monkeypatch.setattr(annotate, "pileup_region", no_pileup)
+    second = annotate.annotate_low_confident_variant(
+        input_csv, bam_file, str(tmp_path / "second.csv"), threads=1, cache_file=cache_file)
+
+    assert second == first
+    assert (tmp_path / "first.csv").read_text() == (tmp_path / "second.csv").read_text()
+
+
+def test_cache_keeps_only_the_current_bam_version(flagged):
+    input_csv, bam_file, tmp_path = flagged
+    cache_file = str(tmp_path / "cache.json")
+
+    annotate.annotate_low_confident_variant(input_csv, bam_file, str(tmp_path / "a.csv"), threads=1, cache_file=cache_file)
+    stat = os.stat(bam_file)
+    os.utime(bam_file, (stat.st_atime, stat.st_mtime + 10))
+    annotate.annotate_low_confident_variant(input_csv, bam_file, str(tmp_path / "b.csv"), threads=1, cache_file=cache_file)
+
+    with open(cache_file) as f:
+        assert list(json.load(f)) == [annotate.bam_cache_key(bam_file)]
@@ -0,0 +1,77 @@
+import csv
+
+import pytest
+
+from variant_tools.part_1.callset_intersection import intersect_callsets, merge_callsets, sorted_stream
+
+VCF_HEADER = (
+    "##fileformat=VCFv4.2\n##contig=<ID=chr1,length=1000>\n"
+    "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+)
+
+
+def write_vcf(path, records):
+    lines = [f"chr1\t{pos}\t.\t{ref}\t{alt}\t50\t{flt}\t.\n" for pos, ref, alt, flt in records]
+    path.write_text(VCF_HEADER + "".join(lines))
+    return str(path)
+
+
+@pytest.fixture
+def callsets(tmp_path):
+    truth = tmp_path / "truth.csv"
+    truth.write_text("Operation,POS,REF,ALT\nSNP,10,A,C\nInsertion,20,G,GT\nSNP,30,T,A\n")
+    caller_a = write_vcf(tmp_path / "a.vcf", [(10, "A", "C", "PASS"), (20, "G", "GT", "PASS"), (40, "C", "G", "PASS")])
+    # two alleles at one position are kept apart, and a multi-allelic record gives one variant per ALT
+    caller_b = write_vcf(tmp_path / "b.vcf", [(10, "A", "C,G", "PASS"), (30, "T", "A", "LowQual")])
+    return [("truth", str(truth)), ("a", caller_a), ("b", caller_b)]
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_masks_and_counts(callsets, tmp_path):
+    output = tmp_path / "intersection.csv"
+    counts_file = tmp_path / "counts.csv"
+    counts = intersect_callsets(callsets, str(output), str(counts_file))
+
+    masks = {(row["POS"], row["ALT"]): int(row["Mask"]) for row in read_rows(output)}
+    assert masks == {
+        ("10", "C"): 0b111,
+        ("10", "G"): 0b100,
+        ("20", "GT"): 0b011,
+        ("30", "A"): 0b101,
+        ("40", "G"): 0b010,
+    }
+    assert counts == {0b111: 1, 0b100: 1, 0b011: 1, 0b101: 1, 0b010: 1}
+
+    by_intersection = {row["Intersection"]: row for row in read_rows(counts_file)}
+    assert by_intersection["truth&a"]["INDEL"] == "1"
+    assert by_intersection["truth&a&b"]["Degree"] == "3"
+
+
+def test_pass_only_drops_filtered_records(callsets, tmp_path):
+    output = tmp_path / "intersection.csv"
+    intersect_callsets(callsets, str(output), str(tmp_path / "counts.csv"), pass_only=True)
+    masks = {(row["POS"], row["ALT"]): int(row["Mask"]) for row in read_rows(output)}
+    assert masks[("30", "A")] == 0b001
+
+
+def test_same_position_variants_are_buffered_and_deduplicated():
+    variants = [("chr1", 5, "A", "T"), ("chr1", 5, "A", "C"), ("chr1", 5, "A", "T"), ("chr1", 7, "G", "A")]
+    keys = list(sorted_stream(variants, {"chr1": 0}, "calls"))
+    assert [(key[1], key[3]) for key in keys] == [(5, "C"), (5, "T"), (7, "A")]
+
+
+def test_merge_follows_contig_order():
+    contig_rank = {"chrB": 0, "chrA": 1}
+    first = sorted_stream([("chrB", 50, "A", "T"), ("chrA", 1, "C", "G")], contig_rank, "first")
+    second = sorted_stream([("chrA", 1, "C", "G")], contig_rank, "second")
+    assert list(merge_callsets([first, second])) == [("chrB", 50, "A", "T", 0b01), ("chrA", 1, "C", "G", 0b11)]
+
+
+def test_unsorted_input_raises(tmp_path):
+    unsorted = write_vcf(tmp_path / "unsorted.vcf", [(30, "T", "A", "PASS"), (10, "A", "C", "PASS")])
+    with pytest.raises(ValueError, match="not coordinate-sorted"):
+        intersect_callsets([("unsorted", unsorted)], str(tmp_path / "out.csv"), str(tmp_path / "counts.csv"))
@@ -0,0 +1,76 @@
+import argparse
+import subprocess
+import sys
+
+import pytest
+
+from variant_tools.cli import build_parser, main
+from variant_tools.part_2 import annotate_low_confident_variant, count_low_confident_variant
+
+
+@pytest.mark.parametrize("argv", [
+    ["--daemon", "mutate", "ref.fa"],
+    ["mutate", "ref.fa", "--daemon"],
+])
+def test_daemon_flag_before_or_after_the_subcommand(argv):
+    args = build_parser().parse_args(argv)
+    assert (args.command, args.reference, args.daemon, args.daemon_socket) == ("mutate", "ref.fa", True, None)
+
+
+@pytest.mark.parametrize("argv", [
+    ["--daemon-socket", "/tmp/vt.sock", "compare", "calls.vcf", "truth.csv"],
+    ["compare", "calls.vcf", "truth.csv", "--daemon-socket", "/tmp/vt.sock"],
+])
+def test_daemon_socket_before_or_after_the_subcommand(argv):
+    args = build_parser().parse_args(argv)
+    assert (args.command, args.vcf, args.csv) == ("compare", "calls.vcf", "truth.csv")
+    assert args.daemon_socket == "/tmp/vt.sock"
+
+
+def test_subcommand_defaults_keep_the_global_daemon_flag():
+    args = build_parser().parse_args(["--daemon", "simulate-reads", "genome.txt"])
+    assert args.daemon and args.genome == "genome.txt"
+
+
+HEAVY_MODULES = ["numpy", "pandas", "pysam"]
+SUBCOMMANDS = next(a for a in build_parser()._actions if isinstance(a, argparse._SubParsersAction)).choices
+
+
+@pytest.mark.parametrize("argv", [["--help"]] + [[command, "--help"] for command in SUBCOMMANDS])
+def test_help_does_not_import_heavy_modules(argv):
+    code = (
+        "import contextlib, io, sys\n"
+        "from variant_tools import cli\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        f"        cli.main({argv!r})\n"
+        "    except SystemExit as e:\n"
+        "        assert e.code == 0, e.code\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    assert result.stdout.strip() == ""
+
+
+def test_evidence_csv_is_named_after_the_output(tmp_path, monkeypatch):
+    evidence_files = []
+    monkeypatch.setattr(count_low_confident_variant, "count_low_confident_variant", lambda vcf, output, min_qual: 0)
+    monkeypatch.setattr(
+        annotate_low_confident_variant, "annotate_low_confident_variant",
+        lambda output, bam, evidence_csv, threads, cache_file: evidence_files.append(evidence_csv) or {}
+    )
+    for output in ["calls.csv", "calls.tsv", "my.csv.dir/calls"]:
+        assert main(["flag-lowconf", "merged.vcf.gz", "--output", output, "--bam", "reads.bam"]) == 0
+    assert evidence_files == ["calls_evidence.csv", "calls_evidence.tsv", "my.csv.dir/calls_evidence.csv"]
+
+
+@pytest.mark.parametrize("argv, env", [
+    (["--daemon", "--telemetry", "run.json", "compare", "calls.vcf", "truth.csv"], {}),
+    (["--profile", "mutate", "ref.fa", "--daemon"], {}),
+    (["--daemon", "compare", "calls.vcf", "truth.csv"], {"VARIANT_TOOLS_PROFILE": "tracemalloc"}),
+])
+def test_telemetry_is_rejected_with_daemon(argv, env, monkeypatch, capsys):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert main(argv) == 2
+    assert "not supported with --daemon" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+import json
+
+import pandas as pd
+
+from variant_tools.part_1.concordance_metrics import concordance_metrics, genotype_concordance, in_regions, write_report
+from variant_tools.part_1.merge_results_simulate_and_bcftools import merge_and_compare
+
+VCF_HEADER = "##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+
+
+def test_in_regions_uses_half_open_bed_intervals():
+    bed = pd.DataFrame({"CHROM": ["chr1", "chr1"], "START": [10, 12], "END": [20, 15]})
+    positions = [10, 11, 20, 21]
+    assert in_regions(["chr1"] * 4, positions, bed).tolist() == [False, True, True, False]
+
+
+def test_in_regions_keeps_contigs_apart():
+    bed = pd.DataFrame({"CHROM": ["chr2"], "START": [0], "END": [100]})
+    assert in_regions(["chr1", "chr2"], [50, 50], bed).tolist() == [False, True]
+
+
+def test_in_regions_overlapping_intervals():
+    bed = pd.DataFrame({"CHROM": ["chr1", "chr1"], "START": [0, 5], "END": [100, 10]})
+    assert in_regions(["chr1"], [50], bed).tolist() == [True]
+
+
+def test_truth_csv_takes_the_vcf_contig(tmp_path):
+    vcf = tmp_path / "calls.vcf"
+    vcf.write_text(VCF_HEADER + "chrA\t5\t.\tA\tC\t50\tPASS\t.\nchrA\t9\t.\tG\tT\t50\tPASS\t.\n")
+    truth = tmp_path / "truth.csv"
+    truth.write_text("Operation,POS,REF,ALT\nSNP,5,A,C\nSNP,30,T,G\n")
+
+    result = merge_and_compare(str(vcf), str(truth), str(tmp_path / "merged.csv"))
+    assert set(result["CHROM"]) == {"chrA"}
+    assert dict(zip(result["POS"], result["Source"])) == {5: "Both", 9: "VCF_only", 30: "CSV_only"}
+
+    bed = tmp_path / "regions.bed"
+    bed.write_text("chrA\t0\t10\nchrB\t0\t100\n")
+    metrics = concordance_metrics(result, bed_files=[str(bed)])
+    inside = metrics[(metrics["Stratifier"] == "BED_regions") & (metrics["Stratum"] == "inside")].iloc[0]
+    assert (inside["TP"], inside["FP"], inside["FN"]) == (1, 1, 0)
+
+
+def test_multi_contig_vcf_needs_truth_chrom(tmp_path):
+    vcf = tmp_path / "calls.vcf"
+    vcf.write_text(VCF_HEADER + "chrA\t5\t.\tA\tC\t50\tPASS\t.\nchrB\t5\t.\tA\tC\t50\tPASS\t.\n")
+    truth = tmp_path / "truth.csv"
+    truth.write_text("Operation,POS,REF,ALT\nSNP,5,A,C\n")
+
+    assert merge_and_compare(str(vcf), str(truth), str(tmp_path / "merged.csv")) is None
+
+    result = merge_and_compare(str(vcf), str(truth), str(tmp_path / "merged.csv"), truth_chrom="chrB")
+    assert dict(zip(result["CHROM"], result["Source"])) == {"chrA": "VCF_only", "chrB": "Both"}
+
+
+def test_genotype_concordance_splits_different_alt_alleles(tmp_path):
+    table = pd.DataFrame({
+        "CHROM": ["c"] * 6,
+        "POS": ["1", "2", "3", "4", "5", "6"],
+        "REF": ["A", "C", "G", "T", "A", "C"],
+        "ALT": ["T", "G", "A,C", "C", "G", "T"],
+        "bcftools": ["A", "G", "A", "C", "missing", "T"],
+        "snippy": ["A", "G", "C", "T", "G", "missing"],
+    })
+    matrix, summary = genotype_concordance(table)
+
+    assert matrix.loc["REF", "REF"] == 1
+    assert matrix.loc["ALT", "ALT"] == 1
+    assert matrix.loc["ALT_mismatch", "ALT_mismatch"] == 1
+    assert matrix.loc["ALT", "REF"] == 1
+    assert matrix.loc["missing", "ALT"] == 1
+    assert matrix.loc["ALT", "missing"] == 1
+    assert int(matrix.to_numpy().sum()) == 6
+
+    assert summary["called_by_both"] == 4
+    assert summary["concordant"] == matrix.loc["REF", "REF"] + matrix.loc["ALT", "ALT"] == 2
+    assert summary["alt_mismatch"] == 1
+    assert summary["concordance"] == 0.5
+
+    metrics = concordance_metrics(pd.DataFrame({
+        "CHROM": ["c", "c"], "POS": [1, 2], "REF": ["A", "C"], "ALT": ["T", "CA"], "Source": ["Both", "CSV_only"]
+    }))
+    write_report(metrics, tmp_path / "m.json", tmp_path / "m.csv", genotype=(matrix, summary))
+
+    report = json.loads((tmp_path / "m.json").read_text())
+    assert report["genotype_concordance"]["alt_mismatch"] == 1
+    assert report["genotype_matrix"]["ALT_mismatch"]["ALT_mismatch"] == 1
+    overall = next(row for row in report["metrics"] if row["Stratifier"] == "All")
+    assert (overall["TP"], overall["FN"], overall["Recall"]) == (1, 1, 0.5)
+    assert overall["Precision"] == 1.0
+    assert pd.read_csv(tmp_path / "m.csv").shape[0] == len(metrics)
@@ -0,0 +1,130 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from variant_tools import daemon
+
+
+class BrokenPool:
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args):
+        raise BrokenProcessPool("worker killed")
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced(tmp_path):
+    server = daemon.JobServer(str(tmp_path / "d.sock"), daemon.JobHandler)
+    try:
+        server.start_pool(1, 1024)
+        server.executor.shutdown()
+        broken = server.executor = BrokenPool()
+
+        response = server.run_in_pool("cache-stats", {}, str(tmp_path))
+        assert not response["ok"] and "worker died" in response["error"]
+        assert broken.shut_down and server.executor is not broken
+
+        response = server.run_in_pool("cache-stats", {}, str(tmp_path))
+        assert response["ok"] and response["result"]["cache"]["misses"] == 0
+    finally:
+        server.executor.shutdown()
+        server.server_close()
+
+
+def test_empty_reply_raises_value_error(tmp_path):
+    socket_path = str(tmp_path / "d.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+
+    def close_without_reply():
+        connection, _ = listener.accept()
+        connection.recv(4096)
+        connection.close()
+
+    thread = threading.Thread(target=close_without_reply)
+    thread.start()
+    try:
+        with pytest.raises(ValueError):
+            daemon.submit("ping", socket_path=socket_path)
+    finally:
+        thread.join()
+        listener.close()
+
+
+def test_lru_cache_evicts_least_recently_used_by_bytes():
+    cache = daemon.LRUCache(max_bytes=10)
+    cache.get("a", lambda: "aaaa")
+    cache.get("b", lambda: "bbbb")
+    assert cache.get("a", lambda: "not loaded") == "aaaa"
+
+    # "b" is the least recently used entry, so it makes room for "c"
+    cache.get("c", lambda: "cccc")
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats() == {"entries": 2, "bytes": 8, "max_bytes": 10, "hits": 1, "misses": 3}
+
+    assert cache.get("b", lambda: "reloaded") == "reloaded"
+    assert list(cache.entries) == ["b"] and cache.total_bytes == 8
+
+
+def test_lru_cache_keeps_one_entry_larger_than_the_budget():
+    cache = daemon.LRUCache(max_bytes=10)
+    cache.get("small", lambda: "x")
+    cache.get("large", lambda: "y" * 50)
+    assert list(cache.entries) == ["large"] and cache.total_bytes == 50
+
+    cache.get("sized", lambda: [1, 2], size_of=lambda value: 3)
+    assert list(cache.entries) == ["sized"] and cache.total_bytes == 3
+
+
+def test_virtual_genome_entry_counts_the_reference(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "_cache", daemon.LRUCache(10 ** 9))
+    reference = tmp_path / "ref.fasta"
+    reference.write_text(">chr\n" + "ACGT" * 250 + "\n")
+    mutations = tmp_path / "mutations.csv"
+    mutations.write_text("Operation,POS,REF,ALT\nSNP,5,A,C\n")
+
+    genome = daemon.cached_virtual_genome(str(reference), str(mutations))
+    sizes = {key[0]: size for key, (_, size) in daemon._cache.entries.items()}
+    assert sizes["virtual_genome"] == 1000 + 100 * len(genome.pieces)
+
+
+def test_serve_and_submit_reuses_the_cached_truth_set(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "calls.vcf").write_text(
+        "##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+        "chrA\t5\t.\tA\tC\t50\tPASS\t.\nchrA\t9\t.\tG\tT\t50\tPASS\t.\n"
+    )
+    (tmp_path / "truth.csv").write_text("Operation,POS,REF,ALT\nSNP,5,A,C\nSNP,30,T,G\n")
+
+    socket_path = str(tmp_path / "d.sock")
+    server = threading.Thread(target=daemon.serve, args=(socket_path,), kwargs={"workers": 1, "cache_mb": 64})
+    server.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+
+        args = {"vcf": "calls.vcf", "csv": "truth.csv", "output": "merged.csv"}
+        first = daemon.submit("compare", args, socket_path=socket_path)
+        second = daemon.submit("compare", args, socket_path=socket_path)
+        assert first["ok"] and second["ok"], (first, second)
+        assert first["result"] == second["result"] == {"variants": 3}
+        assert (tmp_path / "merged.csv").exists()
+
+        stats = daemon.submit("cache-stats", socket_path=socket_path)["result"]["cache"]
+        assert stats["misses"] == 1 and stats["hits"] == 1
+        assert stats["max_bytes"] == 64 * 1024 * 1024
+    finally:
+        daemon.submit("shutdown", socket_path=socket_path)
+        server.join(timeout=30)
+    assert not server.is_alive() and not os.path.exists(socket_path)
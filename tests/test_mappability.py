@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+from variant_tools.part_1.make_mutation_genome import SafeStringEditor
+from variant_tools.part_1.mappability import compute_mappability
+
+
+def reverse_complement(sequence):
+    return sequence.translate(str.maketrans("ACGT", "TGCA"))[::-1]
+
+
+def brute_force_mappability(contigs, k):
+    counts = {}
+    for _, sequence in contigs:
+        for i in range(len(sequence) - k + 1):
+            kmer = sequence[i:i + k]
+            if "N" not in kmer:
+                canonical = min(kmer, reverse_complement(kmer))
+                counts[canonical] = counts.get(canonical, 0) + 1
+
+    masks = {}
+    for name, sequence in contigs:
+        mask = np.zeros(len(sequence), dtype=bool)
+        for i in range(len(sequence) - k + 1):
+            kmer = sequence[i:i + k]
+            if "N" not in kmer and counts[min(kmer, reverse_complement(kmer))] == 1:
+                mask[i:i + k] = True
+        masks[name] = mask
+    return masks
+
+
+@pytest.mark.parametrize("k", [3, 5, 33])
+def test_compute_mappability_matches_brute_force(k):
+    random.seed(k)
+    repeat = "".join(random.choice("ACGT") for _ in range(40))
+    contigs = [
+        ("c1", "".join(random.choice("ACGT") for _ in range(200)) + repeat + "NNNN" + reverse_complement(repeat)),
+        ("c2", repeat + "".join(random.choice("ACGT") for _ in range(100))),
+    ]
+    expected = brute_force_mappability(contigs, k)
+    masks = compute_mappability(contigs, k)
+    for name, _ in contigs:
+        assert masks[name].tolist() == expected[name].tolist()
+
+
+def test_editor_rejects_a_mask_of_another_length():
+    with pytest.raises(ValueError):
+        SafeStringEditor("ACGTACGT", np.ones(6, dtype=bool))
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from variant_tools.part_2 import pipeline_for_merging_results_from_two_variant_callers as pipeline
+from variant_tools.part_2.pipeline_for_merging_results_from_two_variant_callers import MIN_SAMPLE_THREADS, split_mapping_threads
+
+
+def test_mapping_threads_fit_the_sample_budget():
+    for threads in range(1, 65):
+        map_threads, sort_threads = split_mapping_threads(threads)
+        assert map_threads >= 1 and sort_threads >= 0
+        # minimap2 + samtools view + samtools sort main thread and extra threads
+        assert map_threads + 1 + 1 + sort_threads <= max(threads, MIN_SAMPLE_THREADS)
+
+
+@pytest.fixture
+def cohort(tmp_path, monkeypatch):
+    """stub out the external tools, each fake step writes its output file and records the call"""
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def run_command(cmd, description):
+        calls.append(cmd[0] if cmd[0] != "bcftools" else f"bcftools {cmd[1]}")
+        if cmd[0] == "minimap2":
+            open(cmd[cmd.index("-d") + 1], "w").close()
+        elif cmd[0] == "tabix":
+            open(f"{cmd[-1]}.tbi", "w").close()
+        elif cmd[0] == "samtools":
+            open(f"{cmd[-1]}.fai", "w").close()
+        elif cmd[:2] == ["bcftools", "merge"]:
+            open(cmd[cmd.index("-o") + 1], "w").close()
+        return True
+
+    def run_pipeline(proc1, proc2, proc3, output_file, description):
+        calls.append(f"map {os.path.basename(output_file)}")
+        open(output_file, "w").close()
+        return True
+
+    def call_variants(reference, bam_file, vcf_file, threads=1, compressed=False):
+        calls.append(f"call {os.path.basename(bam_file)}")
+        open(vcf_file, "w").close()
+        return True
+
+    monkeypatch.setattr(pipeline, "run_command", run_command)
+    monkeypatch.setattr(pipeline, "run_pipeline", run_pipeline)
+    monkeypatch.setattr(pipeline, "call_variants_bcftools", call_variants)
+    monkeypatch.setattr(pipeline, "extract_genotypes", lambda vcf, csv_file: calls.append(f"extract {vcf}") or True)
+
+    (tmp_path / "ref.fasta").write_text(">chr\nACGT\n")
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}_1.fq").write_text("@r\nA\n+\nI\n")
+        (tmp_path / f"{name}_2.fq").write_text("@r\nA\n+\nI\n")
+    return tmp_path, calls
+
+
+def write_sheet(path, names):
+    lines = ["sample,read_r1,read_r2"] + [f"{name},{name}_1.fq,{name}_2.fq" for name in names]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_read_sample_sheet_rejects_duplicates(tmp_path, capsys):
+    assert pipeline.read_sample_sheet(write_sheet(tmp_path / "sheet.csv", ["a", "b", "a"])) is None
+    assert "Duplicated samples" in capsys.readouterr().err
+    samples = pipeline.read_sample_sheet(write_sheet(tmp_path / "sheet.csv", ["a", "b"]))
+    assert [s["sample"] for s in samples] == ["a", "b"]
+
+
+def test_run_cohort_skips_finished_samples(cohort):
+    tmp_path, calls = cohort
+    assert pipeline.run_cohort(write_sheet(tmp_path / "sheet.csv", ["a", "b"]), "ref.fasta", "cohort", 8, 4)
+    assert sorted(c for c in calls if c.startswith("call")) == ["call a_mapped_reads.bam", "call b_mapped_reads.bam"]
+    assert "bcftools merge" in calls
+
+    calls.clear()
+    assert pipeline.run_cohort(write_sheet(tmp_path / "sheet.csv", ["a", "b", "c"]), "ref.fasta", "cohort", 8, 4)
+    assert [c for c in calls if c.startswith(("map", "call"))] == ["map c_mapped_reads.bam", "call c_mapped_reads.bam"]
+    assert "bcftools merge" in calls
+
+    # changed reads of a finished sample are mapped and called again
+    calls.clear()
+    (tmp_path / "b_1.fq").write_text("@r\nAC\n+\nII\n")
+    assert pipeline.run_cohort(write_sheet(tmp_path / "sheet.csv", ["a", "b", "c"]), "ref.fasta", "cohort", 8, 4)
+    assert [c for c in calls if c.startswith("call")] == ["call b_mapped_reads.bam"]
+
+
+def test_run_cohort_redoes_samples_older_than_the_reference(cohort):
+    tmp_path, calls = cohort
+    sheet = write_sheet(tmp_path / "sheet.csv", ["a"])
+    assert pipeline.run_cohort(sheet, "ref.fasta", "cohort", 4, 4)
+
+    calls.clear()
+    vcf_gz = tmp_path / "cohort" / "a" / "a_variants_bcf.vcf.gz"
+    old = os.path.getmtime(vcf_gz) - 100
+    os.utime(vcf_gz, (old, old))
+    assert pipeline.run_cohort(sheet, "ref.fasta", "cohort", 4, 4)
+    assert "call a_mapped_reads.bam" in calls
+
+
+def test_single_sample_cohort_skips_merge(cohort):
+    tmp_path, calls = cohort
+    assert pipeline.run_cohort(write_sheet(tmp_path / "sheet.csv", ["a"]), "ref.fasta", "cohort", 4, 4)
+    assert "bcftools merge" not in calls
+    assert calls[-1] == f"extract {os.path.join('cohort', 'a', 'a_variants_bcf.vcf.gz')}"
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+
+from variant_tools.part_1.simulate_illumina_short_reads import (
+    genome_to_targeted_paired_reads, read_target_windows, reverse_complement
+)
+from variant_tools.part_1.virtual_mutated_genome import VirtualMutatedGenome
+
+
+def read_sequences(fastq_file):
+    with open(fastq_file) as f:
+        return [line.strip() for i, line in enumerate(f) if i % 4 == 1]
+
+
+def test_targeted_reads_keep_full_depth_between_close_windows(tmp_path):
+    random.seed(7)
+    reference = "".join(random.choice("ACGT") for _ in range(20000))
+    genome = VirtualMutatedGenome(reference, [])
+
+    # two targets whose flanked windows are 43 bases apart, much less than one fragment
+    bed = tmp_path / "targets.bed"
+    bed.write_text("chr\t5000\t5001\nchr\t5444\t5445\n")
+    windows = read_target_windows(str(bed), len(reference), flank=200)
+    assert windows == [(4800, 5201), (5244, 5645)]
+
+    prefix = str(tmp_path / "reads")
+    genome_to_targeted_paired_reads(genome, windows, prefix, read_length=100, coverage=200, insert_size=300)
+
+    depth = np.zeros(len(reference), dtype=int)
+    for read in read_sequences(f"{prefix}_R1.fastq"):
+        start = reference.find(read)
+        depth[start:start + len(read)] += 1
+    for read in read_sequences(f"{prefix}_R2.fastq"):
+        start = reference.find(reverse_complement(read))
+        depth[start:start + len(read)] += 1
+
+    # sampling the shared fragment starts twice gave about 1.4x depth over the windows and 1.8x in the gap
+    for start, end in windows + [(5201, 5244)]:
+        assert 170 <= depth[start:end].mean() <= 230
+
+
+def test_bed_targets_on_other_contigs_are_skipped(tmp_path, capsys):
+    bed = tmp_path / "targets.bed"
+    bed.write_text("chr1\t1000\t1001\nchr2\t2000\t2001\nchr2\t3000\t3001\n")
+
+    assert read_target_windows(str(bed), 10000, flank=100, chrom="chr1") == [(900, 1101)]
+    assert "Skipped target regions not on chr1: chr2 (2)" in capsys.readouterr().out
+
+    assert read_target_windows(str(bed), 10000, flank=100, chrom="chr3") is None
+    assert "Error: No target regions on chr3" in capsys.readouterr().out
+
+    # without a known contig every region is used
+    assert len(read_target_windows(str(bed), 10000, flank=100)) == 3
@@ -0,0 +1,63 @@
+import json
+import os
+import pstats
+
+from variant_tools import telemetry
+
+
+def test_disabled_stage_is_the_shared_null_context():
+    tm = telemetry.Telemetry()
+    assert tm.stage("perform_indels") is telemetry._NULL_STAGE
+    with tm.stage("perform_indels"):
+        pass
+    tm.count("perform_indels", "edits", 10)
+    assert tm.stages == {}
+    assert tm.write_summary("unused.json") is None
+
+
+def test_counters_accumulate_and_rates_are_per_second(tmp_path):
+    tm = telemetry.Telemetry(enabled=True)
+    for _ in range(2):
+        with tm.stage("genome_to_paired_reads"):
+            tm.count("genome_to_paired_reads", "reads", 50)
+    tm.count("genome_to_paired_reads", "reads")
+
+    record = tm.summary()["stages"]["genome_to_paired_reads"]
+    assert record["calls"] == 2 and record["counters"] == {"reads": 101}
+    assert record["rates"]["reads_per_sec"] == 101 / record["seconds"]
+
+    summary_file = str(tmp_path / "run.json")
+    assert tm.write_summary(summary_file) == summary_file
+    with open(summary_file) as f:
+        assert json.load(f)["stages"]["genome_to_paired_reads"]["counters"] == {"reads": 101}
+
+
+def test_configure_reads_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(telemetry.TELEMETRY_ENV, str(tmp_path / "run.json"))
+    monkeypatch.setenv(telemetry.PROFILE_ENV, "cprofile, tracemalloc")
+    monkeypatch.setenv(telemetry.PROFILE_DIR_ENV, str(tmp_path / "profiles"))
+    monkeypatch.setattr(telemetry, "_telemetry", None)
+
+    tm = telemetry.get_telemetry()
+    assert tm.enabled and tm.cprofile and tm.trace_memory
+    assert tm.summary_file == str(tmp_path / "run.json")
+    assert tm.profile_dir == str(tmp_path / "profiles")
+    assert telemetry.get_telemetry() is tm
+
+    monkeypatch.delenv(telemetry.TELEMETRY_ENV)
+    monkeypatch.delenv(telemetry.PROFILE_ENV)
+    assert not telemetry.configure().enabled
+
+
+def test_profile_and_peak_memory_per_stage_call(tmp_path):
+    tm = telemetry.Telemetry(cprofile=True, trace_memory=True, profile_dir=str(tmp_path))
+    for size in [1, 4]:
+        with tm.stage("restore_snps"):
+            data = bytearray(size * 1024 * 1024)
+            del data
+
+    record = tm.stages["restore_snps"]
+    assert record["pstats"] == [os.path.join(str(tmp_path), f"restore_snps.{call}.pstats") for call in [1, 2]]
+    for pstats_file in record["pstats"]:
+        assert pstats.Stats(pstats_file).total_calls > 0
+    assert record["peak_memory_bytes"] >= 4 * 1024 * 1024
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from variant_tools.part_1.make_mutation_genome import SafeStringEditor, write_report_csv
+from variant_tools.part_1.virtual_mutated_genome import VirtualMutatedGenome
+
+
+def make_editor(seed):
+    random.seed(seed)
+    reference = "".join(random.choice("ACGT") for _ in range(random.randint(20, 200)))
+    editor = SafeStringEditor(reference)
+    editor.pre_snps_sequence(random.randint(0, 10))
+    editor.perform_indels(random.randint(1, 12))
+    editor.restore_snps()
+    return editor
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_from_editor_matches_final_string(seed):
+    editor = make_editor(seed)
+    assert str(VirtualMutatedGenome.from_editor(editor)) == editor.get_final_string()
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_from_report_csv_matches_or_raises(seed, tmp_path):
+    editor = make_editor(seed)
+    csv_file = tmp_path / "mutations.csv"
+    write_report_csv(editor.generate_report(None), csv_file)
+
+    try:
+        genome = VirtualMutatedGenome.from_report_csv(editor.original_string, csv_file)
+    except ValueError:
+        return
+    assert str(genome) == editor.get_final_string()
+
+
+def test_insertion_at_position_zero_round_trips(tmp_path):
+    editor = SafeStringEditor("ACGTACGT")
+    editor.operations_log.append({"type": "insert", "position": 0, "sequence": "TT", "length": 2})
+
+    csv_file = tmp_path / "mutations.csv"
+    write_report_csv(editor.generate_report(None), csv_file)
+    assert str(VirtualMutatedGenome.from_report_csv("ACGTACGT", csv_file)) == "TTACGTACGT"
+
+
+def test_overlapping_edits_raise():
+    with pytest.raises(ValueError):
+        VirtualMutatedGenome("ACGTACGT", [(2, 3, ""), (3, 1, "A")])
+
+
+def test_ambiguous_insertions_raise(tmp_path):
+    csv_file = tmp_path / "mutations.csv"
+    csv_file.write_text("Operation,POS,REF,ALT\nInsertion,3,G,GA\nInsertion,3,G,GC\n")
+    with pytest.raises(ValueError):
+        VirtualMutatedGenome.from_report_csv("ACGTACGT", csv_file)
+
+
+def test_to_mutated_position():
+    # insertion before base 2, deletion of bases 5-6, SNP at base 8
+    genome = VirtualMutatedGenome("ACGTACGTAC", [(2, 0, "TT"), (5, 2, ""), (8, 1, "G")])
+    assert str(genome) == "ACTTGTATGC"
+
+    expected = {0: 0, 1: 1, 2: 4, 4: 6, 5: 7, 6: 7, 7: 7, 8: 8, 9: 9, 10: 10}
+    assert {pos: genome.to_mutated_position(pos) for pos in expected} == expected
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_to_mutated_position_keeps_unedited_bases(seed):
+    editor = make_editor(seed)
+    genome = VirtualMutatedGenome.from_editor(editor)
+    mutated = str(genome)
+
+    edited = set()
+    for start, length, _ in genome.applied_edits:
+        edited.update(range(start, start + length))
+
+    for pos, base in enumerate(editor.original_string):
+        if pos not in edited:
+            assert mutated[genome.to_mutated_position(pos)] == base
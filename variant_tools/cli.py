@@ -0,0 +1,437 @@
+import argparse
+import os
+import random
+import sys
+
+from variant_tools import telemetry
+
+# pandas, pysam and NumPy are imported inside the subcommands that need them,
+# so `--help` and the light subcommands start without loading them
+
+
+def run_mutate(args):
+    from variant_tools.part_1.make_mutation_genome import SafeStringEditor, read_fasta_sequence, write_report_csv
+
+    tm = telemetry.get_telemetry()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    with tm.stage("read_reference"):
+        original = read_fasta_sequence(args.reference)
+    if not original:
+        return 1
+
+    allowed_positions = None
+    if args.mappability:
+        from variant_tools.part_1.mappability import genome_mappability
+
+        with tm.stage("mappability"):
+            unique = genome_mappability(args.reference, k=args.kmer)
+        allowed_positions = unique if args.mappability == "avoid" else ~unique
+
+    try:
+        editor = SafeStringEditor(original, allowed_positions)
+    except ValueError as e:
+        print(f"Error: --mappability needs a single-contig fasta, {args.reference} does not match its mask - {e}",
+              file=sys.stderr)
+        return 1
+    with tm.stage("pre_snps_sequence"):
+        editor.pre_snps_sequence(args.snps)
+    with tm.stage("perform_indels"):
+        editor.perform_indels(args.indels)
+    tm.count("perform_indels", "edits", len(editor.operations_log))
+    with tm.stage("restore_snps"):
+        editor.restore_snps()
+    tm.count("restore_snps", "edits", len(editor.snp_records))
+
+    genome_file = None if args.no_genome else args.genome_out
+    with tm.stage("generate_report"):
+        report = editor.generate_report(genome_file)
+        print(report)
+        write_report_csv(report, args.csv)
+    tm.count_file_bytes("generate_report", genome_file, args.csv)
+    return 0
+
+
+def run_simulate_reads(args):
+    from variant_tools.part_1.simulate_illumina_short_reads import (
+        genome_to_paired_reads, genome_to_targeted_paired_reads, read_genome, read_genome_name,
+        read_target_windows, write_regions_bed
+    )
+
+    tm = telemetry.get_telemetry()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.mutations:
+        from variant_tools.part_1.virtual_mutated_genome import VirtualMutatedGenome
+
+        with tm.stage("read_reference"):
+            reference = read_genome(args.genome)
+            if not reference:
+                return 1
+            try:
+                genome = VirtualMutatedGenome.from_report_csv(reference, args.mutations)
+            except ValueError as e:
+                print(f"Error: Can NOT rebuild the mutated genome from {args.mutations} - {e}", file=sys.stderr)
+                print("Write the mutated genome with `variant-tools mutate` and simulate from that file", file=sys.stderr)
+                return 1
+    else:
+        genome = args.genome
+
+    if args.targets:
+        if not args.mutations:
+            print("Error: --targets needs --mutations to map the targets onto the mutated genome", file=sys.stderr)
+            return 2
+
+        chrom = args.chrom or read_genome_name(args.genome)
+        windows = read_target_windows(args.targets, len(reference), flank=args.flank, chrom=chrom)
+        if windows is None:
+            return 1
+        write_regions_bed(windows, chrom or "chr", args.regions_out or f"{args.output_prefix}_regions.bed")
+
+        with tm.stage("genome_to_paired_reads"):
+            read_count = genome_to_targeted_paired_reads(
+                genome,
+                windows,
+                args.output_prefix,
+                read_length=args.read_length,
+                coverage=args.coverage,
+                insert_size=args.insert_size
+            )
+        tm.count("genome_to_paired_reads", "target_bases", sum(end - start for start, end in windows))
+    else:
+        with tm.stage("genome_to_paired_reads"):
+            read_count = genome_to_paired_reads(
+                genome,
+                args.output_prefix,
+                read_length=args.read_length,
+                num_reads=args.num_reads,
+                coverage=args.coverage,
+                insert_size=args.insert_size
+            )
+    if read_count is None:
+        return 1
+    tm.count("genome_to_paired_reads", "reads", read_count * 2)
+    tm.count_file_bytes("genome_to_paired_reads", f"{args.output_prefix}_R1.fastq", f"{args.output_prefix}_R2.fastq")
+    return 0
+
+
+def run_compare(args):
+    from variant_tools.part_1.merge_results_simulate_and_bcftools import merge_and_compare
+
+    tm = telemetry.get_telemetry()
+
+    with tm.stage("merge_and_compare"):
+        result = merge_and_compare(args.vcf, args.csv, args.output, truth_chrom=args.truth_chrom)
+    if result is None:
+        return 1
+    tm.count("merge_and_compare", "variants_joined", len(result))
+    tm.count_file_bytes("merge_and_compare", args.output)
+
+    if args.metrics_prefix:
+        from variant_tools.part_1.concordance_metrics import concordance_metrics, write_report
+
+        with tm.stage("concordance_metrics"):
+            metrics = concordance_metrics(result, bed_files=args.bed, mappability_bed=args.mappability_bed)
+            write_report(metrics, f"{args.metrics_prefix}.json", f"{args.metrics_prefix}.csv")
+        tm.count("concordance_metrics", "variants", len(result))
+    return 0
+
+
+def run_intersect(args):
+    from variant_tools.part_1.callset_intersection import intersect_callsets, parse_source
+
+    tm = telemetry.get_telemetry()
+
+    sources = []
+    if args.truth:
+        sources.append(("truth", args.truth))
+    sources.extend(parse_source(spec) for spec in args.vcf)
+
+    try:
+        with tm.stage("intersect_callsets"):
+            counts = intersect_callsets(
+                sources,
+                args.output,
+                args.counts,
+                truth_chrom=args.truth_chrom,
+                contigs=args.contigs.split(",") if args.contigs else None,
+                pass_only=args.pass_only
+            )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if counts is None:
+        return 1
+    tm.count("intersect_callsets", "variants", sum(counts.values()))
+    return 0
+
+
+def run_mappability(args):
+    from variant_tools.part_1.mappability import load_mappability, write_low_mappability_bed
+
+    tm = telemetry.get_telemetry()
+
+    with tm.stage("mappability"):
+        masks = load_mappability(args.reference, k=args.kmer)
+        write_low_mappability_bed(masks, args.bed or f"{args.reference}.k{args.kmer}.low_mappability.bed")
+    tm.count("mappability", "bases", sum(len(mask) for mask in masks.values()))
+    return 0
+
+
+def run_pipeline(args):
+    from variant_tools.part_2.pipeline_for_merging_results_from_two_variant_callers import main, run_cohort
+
+    tm = telemetry.get_telemetry()
+
+    if args.sample_sheet:
+        with tm.stage("run_cohort"):
+            ok = run_cohort(
+                args.sample_sheet,
+                reference=args.reference,
+                cohort_dir=args.cohort_dir,
+                total_threads=args.threads,
+                threads_per_sample=args.threads_per_sample
+            )
+        return 0 if ok else 1
+
+    if not (args.read_r1 and args.read_r2):
+        print("Error: --read-r1 and --read-r2 are required without --sample-sheet", file=sys.stderr)
+        return 2
+
+    with tm.stage("pipeline"):
+        main(reference=args.reference, read_r1=args.read_r1, read_r2=args.read_r2, prefix=args.prefix)
+    return 0
+
+
+def run_flag_lowconf(args):
+    from variant_tools.part_2.count_low_confident_variant import count_low_confident_variant
+
+    tm = telemetry.get_telemetry()
+
+    with tm.stage("count_low_confident_variant"):
+        count = count_low_confident_variant(args.vcf, args.output, min_qual=args.min_qual)
+    tm.count("count_low_confident_variant", "variants_flagged", count)
+
+    if args.bam:
+        from variant_tools.part_2.annotate_low_confident_variant import annotate_low_confident_variant
+
+        root, ext = os.path.splitext(args.output)
+        evidence_csv = args.evidence_output or f"{root}_evidence{ext or '.csv'}"
+        with tm.stage("annotate_low_confident_variant"):
+            evidence = annotate_low_confident_variant(
+                args.output, args.bam, evidence_csv, threads=args.threads, cache_file=args.cache)
+        if evidence is None:
+            return 1
+        tm.count("annotate_low_confident_variant", "sites", len(evidence))
+    return 0
+
+
+# subcommands that can run on the resident daemon, and the daemon job they map to
+DAEMON_JOBS = {
+    "mutate": "mutate",
+    "simulate-reads": "simulate",
+    "compare": "compare",
+}
+
+
+def run_on_daemon(args):
+    from variant_tools import daemon
+
+    # the stage timers and profiles would be collected in the worker processes, not in this client
+    if args.telemetry or args.profile or args.trace_memory or os.environ.get(telemetry.TELEMETRY_ENV) \
+            or os.environ.get(telemetry.PROFILE_ENV):
+        print("Error: Telemetry and profiling are not supported with --daemon, run the command without --daemon",
+              file=sys.stderr)
+        return 2
+
+    job_args = {
+        key: value for key, value in vars(args).items()
+        if key not in (
+            "func", "command", "daemon", "daemon_socket", "telemetry", "profile", "trace_memory", "profile_dir"
+        )
+    }
+    try:
+        response = daemon.submit(DAEMON_JOBS[args.command], job_args, socket_path=args.daemon_socket)
+    except OSError as e:
+        print(f"Error: Can NOT reach daemon at {args.daemon_socket} - {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Error: Bad reply from daemon at {args.daemon_socket} - {e}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write(response.get("output", ""))
+    if not response["ok"]:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_daemon(args):
+    from variant_tools import daemon
+
+    if args.stop or args.status:
+        try:
+            response = daemon.submit("shutdown" if args.stop else "ping", socket_path=args.socket)
+        except (OSError, ValueError) as e:
+            print(f"Error: Can NOT talk to daemon at {args.socket} - {e}", file=sys.stderr)
+            return 1
+        print(response["result"])
+        return 0
+
+    return 0 if daemon.serve(args.socket, workers=args.workers, cache_mb=args.cache_mb) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="variant-tools",
+        description="Simulate mutated genomes and reads, and compare variant calls"
+    )
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help=f"write stage timers and counters to a JSON file (env: {telemetry.TELEMETRY_ENV})")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"write a cProfile pstats file per stage (env: {telemetry.PROFILE_ENV}=cprofile)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help=f"record peak memory per stage with tracemalloc (env: {telemetry.PROFILE_ENV}=tracemalloc)")
+    parser.add_argument("--profile-dir", help="directory of the pstats files (default: profiles)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run mutate, simulate-reads or compare on a running daemon")
+    parser.add_argument("--daemon-socket", metavar="PATH",
+                        help="socket of the daemon, implies --daemon (default: ~/.variant-tools.sock)")
+
+    # the daemon options are also accepted after the subcommand,
+    # SUPPRESS keeps the subcommand defaults from overwriting the values given before it
+    daemon_options = argparse.ArgumentParser(add_help=False)
+    daemon_options.add_argument("--daemon", action="store_true", default=argparse.SUPPRESS,
+                                help="run on a running daemon")
+    daemon_options.add_argument("--daemon-socket", metavar="PATH", default=argparse.SUPPRESS,
+                                help="socket of the daemon, implies --daemon")
+
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    mutate = subparsers.add_parser("mutate", parents=[daemon_options], help="simulate SNPs and indels on a reference genome")
+    mutate.add_argument("reference", help="reference genome fasta")
+    mutate.add_argument("--snps", type=int, default=300, help="number of SNPs (default: 300)")
+    mutate.add_argument("--indels", type=int, default=20, help="number of 1-10 base indels (default: 20)")
+    mutate.add_argument("--csv", default="simulated_mutated_genome.csv", help="mutation record csv")
+    mutate.add_argument("--genome-out", default="simulated_mutated_genome.txt", help="mutated genome file")
+    mutate.add_argument("--no-genome", action="store_true",
+                        help="do not write the mutated genome, reads can be simulated from the csv")
+    mutate.add_argument("--mappability", choices=["avoid", "target"],
+                        help="place mutations only outside or only inside low-mappability regions")
+    mutate.add_argument("--kmer", type=int, default=100, help="k-mer size of the mappability mask (default: 100)")
+    mutate.add_argument("--seed", type=int, help="random seed")
+    mutate.set_defaults(func=run_mutate)
+
+    simulate = subparsers.add_parser("simulate-reads", parents=[daemon_options], help="simulate Illumina paired-end reads")
+    simulate.add_argument("genome", help="mutated genome file, or the reference when --mutations is given")
+    simulate.add_argument("--mutations", help="mutation record csv, reads are sampled from the virtual genome")
+    simulate.add_argument("--output-prefix", default="simulated_read", help="prefix of the fastq files")
+    simulate.add_argument("--read-length", type=int, default=100)
+    simulate.add_argument("--coverage", type=float, default=30)
+    simulate.add_argument("--num-reads", type=int, help="number of read pairs, overrides --coverage")
+    simulate.add_argument("--insert-size", type=int, default=300)
+    simulate.add_argument("--targets", help="simulate reads only around these targets: the mutation csv or a BED")
+    simulate.add_argument("--flank", type=int, default=500, help="bases added on each side of a target (default: 500)")
+    simulate.add_argument("--regions-out", help="BED of target windows for bcftools mpileup -R "
+                                                "(default: OUTPUT_PREFIX_regions.bed)")
+    simulate.add_argument("--chrom", help="contig of the targets and of the regions BED (default: the fasta header)")
+    simulate.add_argument("--seed", type=int, help="random seed")
+    simulate.set_defaults(func=run_simulate_reads)
+
+    compare = subparsers.add_parser("compare", parents=[daemon_options], help="compare bcftools calls with the simulated mutations")
+    compare.add_argument("vcf", help="bcftools VCF")
+    compare.add_argument("csv", help="mutation record csv")
+    compare.add_argument("--output", default="merged_result.csv")
+    compare.add_argument("--truth-chrom", help="contig of the mutation csv (default: the only VCF contig)")
+    compare.add_argument("--metrics-prefix", help="also write concordance metrics to PREFIX.json and PREFIX.csv")
+    compare.add_argument("--bed", action="append", help="BED regions to stratify metrics by, can be repeated")
+    compare.add_argument("--mappability-bed", help="low-mappability BED, metrics are reported as low/unique")
+    compare.set_defaults(func=run_compare)
+
+    mappability = subparsers.add_parser(
+        "mappability", help="compute the k-mer mappability mask of a reference, cached next to the fasta")
+    mappability.add_argument("reference", help="reference genome fasta")
+    mappability.add_argument("--kmer", type=int, default=100, help="k-mer size, e.g. the read length (default: 100)")
+    mappability.add_argument("--bed", help="low-mappability BED (default: REFERENCE.kK.low_mappability.bed)")
+    mappability.set_defaults(func=run_mappability)
+
+    intersect = subparsers.add_parser(
+        "intersect", help="single-pass intersection of the truth set and several coordinate-sorted VCFs")
+    intersect.add_argument("--truth", help="mutation record csv")
+    intersect.add_argument("--truth-chrom", help="contig of the truth csv (default: the only VCF contig)")
+    intersect.add_argument("--vcf", action="append", default=[], metavar="[NAME=]VCF",
+                           help="coordinate-sorted VCF, can be repeated")
+    intersect.add_argument("--contigs", help="comma-separated contig order (default: VCF ##contig lines)")
+    intersect.add_argument("--pass-only", action="store_true", help="skip records with a non-PASS FILTER")
+    intersect.add_argument("--output", default="callset_intersection.csv")
+    intersect.add_argument("--counts", default="callset_intersection_counts.csv")
+    intersect.set_defaults(func=run_intersect)
+
+    resident = subparsers.add_parser(
+        "daemon", help="run a local daemon that keeps references and truth sets resident between jobs")
+    resident.add_argument("--socket", help="Unix socket path (default: ~/.variant-tools.sock)")
+    resident.add_argument("--workers", type=int, help="worker processes (default: all CPUs)")
+    resident.add_argument(
+        "--cache-mb", type=int, default=2048, help="LRU cache size shared by all workers (default: 2048)")
+    resident.add_argument("--stop", action="store_true", help="stop the running daemon")
+    resident.add_argument("--status", action="store_true", help="check that the daemon is running")
+    resident.set_defaults(func=run_daemon)
+
+    pipeline = subparsers.add_parser("pipeline", help="map reads and call variants with bcftools and snippy")
+    pipeline.add_argument("--reference", default="Ecoli_complete_genome.fasta")
+    pipeline.add_argument("--read-r1")
+    pipeline.add_argument("--read-r2")
+    pipeline.add_argument("--prefix", default="Ecoli", help="prefix of the output files")
+    pipeline.add_argument("--sample-sheet", help="csv with sample, read_r1, read_r2 columns for cohort mode")
+    pipeline.add_argument("--cohort-dir", default="Ecoli_cohort")
+    pipeline.add_argument("--threads", type=int, help="global thread budget (default: all CPUs)")
+    pipeline.add_argument("--threads-per-sample", type=int, default=4)
+    pipeline.set_defaults(func=run_pipeline)
+
+    flag = subparsers.add_parser("flag-lowconf", help="flag low confident variants of the merged VCF")
+    flag.add_argument("vcf", help="bgzipped two-caller merged VCF")
+    flag.add_argument("--output", default="not_confident_calls.csv")
+    flag.add_argument("--min-qual", type=float, default=20)
+    flag.add_argument("--bam", help="indexed mapped BAM, adds read evidence for every flagged site")
+    flag.add_argument("--evidence-output", help="annotated csv (default: OUTPUT_evidence.csv)")
+    flag.add_argument("--threads", type=int, default=4)
+    flag.add_argument("--cache", help="json cache of read evidence per BAM and site")
+    flag.set_defaults(func=run_flag_lowconf)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.daemon or args.daemon_socket or args.command == "daemon":
+        from variant_tools import daemon
+
+        if args.command == "daemon":
+            args.socket = args.socket or daemon.DEFAULT_SOCKET
+            return run_daemon(args)
+        args.daemon_socket = args.daemon_socket or daemon.DEFAULT_SOCKET
+        if args.command not in DAEMON_JOBS:
+            print(f"Error: {args.command} can NOT run on the daemon", file=sys.stderr)
+            return 2
+        return run_on_daemon(args)
+
+    tm = telemetry.configure(
+        summary_file=args.telemetry,
+        cprofile=args.profile,
+        trace_memory=args.trace_memory,
+        profile_dir=args.profile_dir
+    )
+    try:
+        return args.func(args)
+    finally:
+        tm.write_summary()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Optional long-running worker for many small jobs.
+# Each pool worker keeps references, .fai indexes, mappability masks and parsed truth sets
+# in its own LRU cache, so repeated jobs only pay for the actual work.
+# The cache budget is shared by the workers, each gets cache_mb / workers.
+# Requests and responses are one JSON object per line over a Unix socket.
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".variant-tools.sock")
+
+
+class LRUCache:
+
+    """least recently used cache bounded by an estimated size in bytes
+        entries are keyed by file path and modification time, so edited files are reloaded"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader, size_of=len):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+        self.misses += 1
+        value = loader()
+        size = size_of(value)
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+        return value
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_cache = None
+
+
+def _init_worker(max_bytes):
+    global _cache
+    _cache = LRUCache(max_bytes)
+
+
+def file_key(kind, path, *extra):
+    path = os.path.abspath(path)
+    return (kind, path, os.path.getmtime(path)) + extra
+
+
+def cached_fasta_sequence(path):
+
+    """reference as read by make_mutation_genome.read_fasta_sequence"""
+
+    from variant_tools.part_1.make_mutation_genome import read_fasta_sequence
+    return _cache.get(file_key("fasta_sequence", path), lambda: read_fasta_sequence(path), lambda s: len(s or ""))
+
+
+def cached_genome(path):
+
+    """reference or mutated genome as read by simulate_illumina_short_reads.read_genome"""
+
+    from variant_tools.part_1.simulate_illumina_short_reads import read_genome
+    return _cache.get(file_key("genome", path), lambda: read_genome(path), lambda s: len(s or ""))
+
+
+def read_fai(fasta_file):
+
+    """read the samtools .fai index, or build the same fields by scanning the fasta
+        return a dict of contig name to (length, offset, line bases, line width)"""
+
+    fai_file = f"{fasta_file}.fai"
+    contigs = {}
+
+    if os.path.exists(fai_file):
+        with open(fai_file, "r") as f:
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) >= 5:
+                    contigs[cols[0]] = tuple(int(c) for c in cols[1:5])
+        return contigs
+
+    name = None
+    length = offset = line_bases = line_width = 0
+    position = 0
+    with open(fasta_file, "rb") as f:
+        for line in f:
+            if line.startswith(b">"):
+                if name is not None:
+                    contigs[name] = (length, offset, line_bases, line_width)
+                name = line[1:].split()[0].decode() if len(line.strip()) > 1 else f"contig_{len(contigs) + 1}"
+                length = line_bases = line_width = 0
+                offset = position + len(line)
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if line_bases == 0:
+                    line_bases, line_width = bases, len(line)
+                length += bases
+            position += len(line)
+
+    if name is not None:
+        contigs[name] = (length, offset, line_bases, line_width)
+    return contigs
+
+
+def cached_fai(path):
+    return _cache.get(file_key("fai", path), lambda: read_fai(path), lambda contigs: 100 * len(contigs))
+
+
+def cached_mappability(path, k):
+    from variant_tools.part_1.mappability import genome_mappability
+    return _cache.get(file_key("mappability", path, k), lambda: genome_mappability(path, k), lambda m: m.nbytes)
+
+
+def cached_virtual_genome(reference_path, mutations_path):
+    from variant_tools.part_1.virtual_mutated_genome import VirtualMutatedGenome
+
+    reference = cached_genome(reference_path)
+    # the genome keeps the reference alive even when the reference entry itself is evicted
+    return _cache.get(
+        file_key("virtual_genome", mutations_path, os.path.abspath(reference_path), os.path.getmtime(reference_path)),
+        lambda: VirtualMutatedGenome.from_report_csv(reference, mutations_path),
+        lambda genome: len(genome.reference) + 100 * len(genome.pieces)
+    )
+
+
+def cached_truth_table(csv_path):
+    from variant_tools.part_1.merge_results_simulate_and_bcftools import read_csv
+    return _cache.get(
+        file_key("truth_table", csv_path), lambda: read_csv(csv_path),
+        lambda df: int(df.memory_usage(deep=True).sum())
+    )
+
+
+def job_mutate(args):
+    from variant_tools.part_1.make_mutation_genome import SafeStringEditor, write_report_csv
+
+    original = cached_fasta_sequence(args["reference"])
+    if not original:
+        raise ValueError(f"Can NOT read reference {args['reference']}")
+
+    allowed_positions = None
+    if args.get("mappability"):
+        unique = cached_mappability(args["reference"], args.get("kmer", 100))
+        allowed_positions = unique if args["mappability"] == "avoid" else ~unique
+
+    editor = SafeStringEditor(original, allowed_positions)
+    editor.pre_snps_sequence(args.get("snps", 300))
+    editor.perform_indels(args.get("indels", 20))
+    editor.restore_snps()
+
+    genome_out = None if args.get("no_genome") else args.get("genome_out", "simulated_mutated_genome.txt")
+    report = editor.generate_report(genome_out)
+    print(report)
+    write_report_csv(report, args.get("csv", "simulated_mutated_genome.csv"))
+    return {"edits": len(editor.snp_records) + len(editor.operations_log)}
+
+
+def job_simulate(args):
+    from variant_tools.part_1.simulate_illumina_short_reads import (
+        genome_to_paired_reads, genome_to_targeted_paired_reads, read_target_windows, write_regions_bed
+    )
+
+    output_prefix = args.get("output_prefix", "simulated_read")
+    read_length = args.get("read_length", 100)
+    coverage = args.get("coverage", 30)
+    insert_size = args.get("insert_size", 300)
+
+    if args.get("mutations"):
+        genome = cached_virtual_genome(args["genome"], args["mutations"])
+    else:
+        genome = cached_genome(args["genome"])
+        if not genome:
+            raise ValueError(f"Can NOT read genome {args['genome']}")
+
+    if args.get("targets"):
+        if not args.get("mutations"):
+            raise ValueError("targets need mutations to map the targets onto the mutated genome")
+
+        chrom = args.get("chrom") or next(iter(cached_fai(args["genome"])), None)
+        windows = read_target_windows(args["targets"], len(genome.reference), flank=args.get("flank", 500), chrom=chrom)
+        if windows is None:
+            raise ValueError(f"no target regions on {chrom} in {args['targets']}")
+        write_regions_bed(windows, chrom or "chr", args.get("regions_out") or f"{output_prefix}_regions.bed")
+        read_count = genome_to_targeted_paired_reads(
+            genome, windows, output_prefix, read_length=read_length, coverage=coverage, insert_size=insert_size
+        )
+    else:
+        read_count = genome_to_paired_reads(
+            genome, output_prefix, read_length=read_length, num_reads=args.get("num_reads"),
+            coverage=coverage, insert_size=insert_size
+        )
+
+    return {"read_pairs": read_count}
+
+
+def job_compare(args):
+    from variant_tools.part_1.merge_results_simulate_and_bcftools import merge_and_compare
+
+    truth = cached_truth_table(args["csv"])
+    result = merge_and_compare(
+        args["vcf"], truth, args.get("output", "merged_result.csv"), truth_chrom=args.get("truth_chrom")
+    )
+    if result is None:
+        raise ValueError("The VCF has several contigs and the csv has no CHROM column, set --truth-chrom")
+
+    if args.get("metrics_prefix"):
+        from variant_tools.part_1.concordance_metrics import concordance_metrics, write_report
+
+        metrics = concordance_metrics(result, bed_files=args.get("bed"), mappability_bed=args.get("mappability_bed"))
+        write_report(metrics, f"{args['metrics_prefix']}.json", f"{args['metrics_prefix']}.csv")
+
+    return {"variants": len(result)}
+
+
+def job_cache_stats(args):
+    return {"pid": os.getpid(), "cache": _cache.stats()}
+
+
+JOBS = {
+    "mutate": job_mutate,
+    "simulate": job_simulate,
+    "compare": job_compare,
+    "cache-stats": job_cache_stats,
+}
+
+
+def run_job(job, args, cwd):
+
+    """run one job in a pool worker
+        relative paths resolve against the client directory, and printed output is returned to the client"""
+
+    os.chdir(cwd)
+    if args.get("seed") is not None:
+        random.seed(args["seed"])
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            result = JOBS[job](args)
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}", "output": output.getvalue(),
+                    "traceback": traceback.format_exc()}
+    return {"ok": True, "result": result, "output": output.getvalue()}
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+            job = request["job"]
+        except (ValueError, KeyError) as e:
+            self.reply({"ok": False, "error": f"Bad request: {e}"})
+            return
+
+        if job == "shutdown":
+            self.reply({"ok": True, "result": "shutting down"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        if job == "ping":
+            self.reply({"ok": True, "result": {"pid": os.getpid(), "workers": self.server.workers}})
+            return
+
+        if job not in JOBS:
+            self.reply({"ok": False, "error": f"Unknown job {job}, expected one of {', '.join(JOBS)}"})
+            return
+
+        try:
+            response = self.server.run_in_pool(job, request.get("args", {}), request.get("cwd", os.getcwd()))
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.reply(response)
+
+    def reply(self, response):
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def start_pool(self, workers, max_bytes):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.pool_lock = threading.Lock()
+        self.executor = self.new_pool()
+
+    def new_pool(self):
+        # forking the threaded server could copy locks held by other handler threads into the workers
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_worker, initargs=(self.max_bytes,)
+        )
+
+    def run_in_pool(self, job, args, cwd):
+
+        """run one job in the worker pool
+            a worker that died (e.g. out of memory) breaks the whole pool, so it is replaced with a fresh one"""
+
+        executor = self.executor
+        try:
+            return executor.submit(run_job, job, args, cwd).result()
+        except BrokenProcessPool as e:
+            with self.pool_lock:
+                # concurrent jobs on the same broken pool replace it only once
+                if self.executor is executor:
+                    print("Warning: A worker died, restarting the worker pool", file=sys.stderr)
+                    self.executor = self.new_pool()
+                    executor.shutdown(wait=False)
+            return {"ok": False, "error": f"A worker died while running {job}, the worker pool was restarted - {e}"}
+
+
+def serve(socket_path=DEFAULT_SOCKET, workers=None, cache_mb=2048):
+
+    """run the daemon in the foreground until a shutdown request
+        cache_mb is the total cache budget of all workers"""
+
+    if os.path.exists(socket_path):
+        try:
+            submit("ping", socket_path=socket_path)
+            print(f"Error: A daemon is already listening on {socket_path}", file=sys.stderr)
+            return False
+        except (OSError, ValueError):
+            os.remove(socket_path)
+
+    workers = workers or os.cpu_count() or 1
+    max_bytes = cache_mb * 1024 * 1024 // workers
+
+    # the socket is only accessible to the current user
+    old_umask = os.umask(0o077)
+    try:
+        server = JobServer(socket_path, JobHandler)
+    finally:
+        os.umask(old_umask)
+
+    server.start_pool(workers, max_bytes)
+    print(f"Listening on {socket_path} with {workers} workers and {cache_mb} MB cache "
+          f"({max_bytes / 1024 / 1024:.0f} MB per worker)")
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+    print("Daemon stopped")
+    return True
+
+
+def submit(job, args=None, socket_path=DEFAULT_SOCKET):
+
+    """thin client: send one job to the daemon and wait for its response
+        raise OSError when the daemon can not be reached and ValueError for an empty or invalid reply"""
+
+    request = {"job": job, "args": args or {}, "cwd": os.getcwd()}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode())
+        with client.makefile("rb") as f:
+            line = f.readline()
+
+    if not line:
+        raise ValueError("the daemon closed the connection without a reply")
+    response = json.loads(line)
+    if not isinstance(response, dict) or "ok" not in response:
+        raise ValueError(f"unexpected reply {line[:100]!r}")
+    return response
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET)
@@ -0,0 +1,211 @@
+import csv
+import gzip
+import heapq
+import os
+import sys
+from collections import Counter
+
+
+def open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path, "r")
+
+
+def read_vcf_contigs(vcf_file):
+
+    """read contig names from the ##contig header lines, in header order"""
+
+    contigs = []
+    with open_text(vcf_file) as f:
+        for line in f:
+            if not line.startswith("##"):
+                break
+            if line.startswith("##contig=<"):
+                for field in line.strip()[len("##contig=<"):-1].split(","):
+                    if field.startswith("ID="):
+                        contigs.append(field[3:])
+    return contigs
+
+
+def read_vcf_variants(vcf_file, pass_only=False):
+
+    """stream (chrom, pos, ref, alt) from a coordinate-sorted VCF
+        multi-allelic records give one variant per ALT allele"""
+
+    with open_text(vcf_file) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 5:
+                continue
+            if pass_only and len(cols) > 6 and cols[6] not in ("PASS", "."):
+                continue
+
+            chrom, pos, ref = cols[0], int(cols[1]), cols[3].upper()
+            for alt in cols[4].split(","):
+                if alt in (".", "*") or alt.startswith("<"):
+                    continue
+                yield chrom, pos, ref, alt.upper()
+
+
+def read_truth_variants(csv_file, chrom):
+
+    """stream (chrom, pos, ref, alt) from the mutation csv written by make_mutation_genome.py
+        the csv has no CHROM column, so all variants are placed on chrom"""
+
+    with open(csv_file, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            yield chrom, int(row["POS"]), (row["REF"] or "").upper(), (row["ALT"] or "").upper()
+
+
+def sorted_stream(variants, contig_rank, source_name):
+
+    """attach merge keys to a coordinate-sorted stream
+        variants at the same position are buffered and sorted by REF/ALT, duplicates are dropped,
+        a stream going backwards raises ValueError"""
+
+    buffer = set()
+    last = None
+
+    for chrom, pos, ref, alt in variants:
+        if chrom not in contig_rank:
+            raise ValueError(f"{source_name}: contig {chrom} is not in the contig list")
+        position = (contig_rank[chrom], pos)
+
+        if last is not None and position != last:
+            if position < last:
+                raise ValueError(f"{source_name}: not coordinate-sorted at {chrom}:{pos}")
+            yield from sorted(buffer)
+            buffer = set()
+
+        buffer.add((position[0], pos, ref, alt, chrom))
+        last = position
+
+    yield from sorted(buffer)
+
+
+def merge_callsets(streams):
+
+    """k-way merge of sorted variant streams
+        yield (chrom, pos, ref, alt, mask) where bit i of mask is set if stream i contains the variant,
+        memory holds one pending variant per stream"""
+
+    def tagged(stream, index):
+        for key in stream:
+            yield key, index
+
+    current = None
+    mask = 0
+
+    for key, index in heapq.merge(*(tagged(stream, i) for i, stream in enumerate(streams))):
+        if key != current:
+            if current is not None:
+                yield current[4], current[1], current[2], current[3], mask
+            current = key
+            mask = 0
+        mask |= 1 << index
+
+    if current is not None:
+        yield current[4], current[1], current[2], current[3], mask
+
+
+def mask_to_names(mask, names):
+    return [name for i, name in enumerate(names) if mask & (1 << i)]
+
+
+def parse_source(spec):
+
+    """parse a source given as name=path or path, the name defaults to the file name"""
+
+    if "=" in spec:
+        name, path = spec.split("=", 1)
+    else:
+        path = spec
+        name = os.path.basename(path).split(".")[0]
+    return name, path
+
+
+def intersect_callsets(sources, output_file, counts_file, truth_chrom=None, contigs=None, pass_only=False):
+
+    """single-pass intersection of a truth csv and any number of VCFs
+        sources are (name, path) pairs, paths ending in .csv are read as truth sets,
+        writes every variant with its membership mask and the UpSet-style intersection counts"""
+
+    names = [name for name, _ in sources]
+    if len(set(names)) != len(names):
+        print(f"Error: Source names must be unique: {', '.join(names)}", file=sys.stderr)
+        return None
+
+    vcf_paths = [path for _, path in sources if not path.endswith(".csv")]
+
+    if not contigs:
+        contigs = []
+        for path in vcf_paths:
+            for contig in read_vcf_contigs(path):
+                if contig not in contigs:
+                    contigs.append(contig)
+
+    has_truth = any(path.endswith(".csv") for _, path in sources)
+    if has_truth and not truth_chrom:
+        if len(contigs) != 1:
+            print("Error: The truth csv has no CHROM column, set truth_chrom", file=sys.stderr)
+            return None
+        truth_chrom = contigs[0]
+    if truth_chrom and truth_chrom not in contigs:
+        contigs.append(truth_chrom)
+
+    if not contigs:
+        print("Error: No ##contig lines found, pass the contig order with contigs", file=sys.stderr)
+        return None
+    contig_rank = {contig: rank for rank, contig in enumerate(contigs)}
+
+    streams = []
+    for name, path in sources:
+        if path.endswith(".csv"):
+            variants = read_truth_variants(path, truth_chrom)
+        else:
+            variants = read_vcf_variants(path, pass_only=pass_only)
+        streams.append(sorted_stream(variants, contig_rank, name))
+
+    counts = Counter()
+    type_counts = Counter()
+
+    with open(output_file, "w", newline="") as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(["CHROM", "POS", "REF", "ALT", "Type", "Mask"] + names)
+
+        for chrom, pos, ref, alt, mask in merge_callsets(streams):
+            var_type = "SNP" if len(ref) == len(alt) else "INDEL"
+            counts[mask] += 1
+            type_counts[(mask, var_type)] += 1
+            writer.writerow(
+                [chrom, pos, ref, alt, var_type, mask] + [1 if mask & (1 << i) else 0 for i in range(len(names))]
+            )
+
+    with open(counts_file, "w", newline="") as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(["Mask", "Intersection", "Degree", "Count", "SNP", "INDEL"])
+        for mask, count in counts.most_common():
+            members = mask_to_names(mask, names)
+            writer.writerow([
+                mask, "&".join(members), len(members), count,
+                type_counts[(mask, "SNP")], type_counts[(mask, "INDEL")]
+            ])
+
+    print(f"Saved {output_file}")
+    print(f"Saved {counts_file}")
+    return counts
+
+
+if __name__ == "__main__":
+    intersect_callsets(
+        [
+            ("truth", "simulated_mutated_genome.csv"),
+            ("bcftools", "Ecoli_simulated_variants_bcf.vcf.gz"),
+            ("snippy", "Ecoli_simulated_snippy_results/snps.vcf.gz")
+        ],
+        "callset_intersection.csv",
+        "callset_intersection_counts.csv"
+    )
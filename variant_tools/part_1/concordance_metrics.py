@@ -0,0 +1,270 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Source labels written by merge_and_compare
+SOURCE_TO_CLASS = {
+    "Both": "TP",
+    "VCF_only": "FP",
+    "CSV_only": "FN"
+}
+
+INDEL_BIN_EDGES = [1, 2, 6, 11, 21]
+INDEL_BIN_LABELS = ["1", "2-5", "6-10", "11-20", ">20"]
+
+
+def load_comparison(comparison):
+
+    """load the output of merge_and_compare
+        accept either the merged csv file or the returned DataFrame"""
+
+    if isinstance(comparison, pd.DataFrame):
+        df = comparison.copy()
+    else:
+        df = pd.read_csv(comparison, dtype={"REF": str, "ALT": str}, keep_default_na=False)
+
+    df["Class"] = df["Source"].map(SOURCE_TO_CLASS)
+    unknown = df["Class"].isna()
+    if unknown.any():
+        print(f"Warning: {int(unknown.sum())} rows with unknown Source are ignored")
+        df = df[~unknown]
+
+    return df.reset_index(drop=True)
+
+
+def read_bed(bed_file):
+
+    """read the first three columns of a bed file
+        header, track and browser lines are skipped"""
+
+    bed = pd.read_csv(
+        bed_file, sep="\t", header=None, usecols=[0, 1, 2], names=["CHROM", "START", "END"],
+        comment="#", dtype={"CHROM": str}
+    )
+    bed = bed[~bed["CHROM"].str.startswith(("track", "browser"))]
+    bed["START"] = bed["START"].astype(np.int64)
+    bed["END"] = bed["END"].astype(np.int64)
+    return bed
+
+
+def in_regions(chroms, positions, bed):
+
+    """flag 1-based positions falling inside any bed interval
+        if chroms is None every interval is used, which is only right for a single-contig bed"""
+
+    positions = np.asarray(positions, dtype=np.int64) - 1
+    inside = np.zeros(len(positions), dtype=bool)
+
+    if chroms is None:
+        groups = [(None, bed)]
+    else:
+        chroms = np.asarray(chroms, dtype=object)
+        groups = bed.groupby("CHROM")
+
+    for chrom, intervals in groups:
+        intervals = intervals.sort_values("START")
+        starts = intervals["START"].to_numpy()
+        # running maximum of ends handles overlapping intervals without merging them
+        ends = np.maximum.accumulate(intervals["END"].to_numpy())
+
+        rows = slice(None) if chrom is None else chroms == chrom
+        pos = positions[rows]
+        idx = np.searchsorted(starts, pos, side="right") - 1
+        hit = idx >= 0
+        hit[hit] = pos[hit] < ends[idx[hit]]
+        inside[rows] = hit
+
+    return inside
+
+
+def annotate_strata(df, bed_files=None, mappability_bed=None):
+
+    """add stratification columns
+        variant type, indel length bin, contig, in/out of each bed file,
+        and low/unique mappability from the bed written by mappability.py"""
+
+    ref_len = df["REF"].str.len().to_numpy()
+    alt_len = df["ALT"].str.len().to_numpy()
+    diff = alt_len - ref_len
+
+    bins = np.digitize(np.abs(diff), INDEL_BIN_EDGES) - 1
+    labels = np.array(INDEL_BIN_LABELS, dtype=object)[np.clip(bins, 0, len(INDEL_BIN_LABELS) - 1)]
+    prefix = np.where(diff > 0, "INS_", "DEL_")
+    df["Indel_Length"] = np.where(diff == 0, "SNP", prefix + labels.astype(str))
+
+    if "Type" not in df.columns:
+        df["Type"] = np.where(diff == 0, "SNP", "INDEL")
+
+    if "CHROM" not in df.columns:
+        df["CHROM"] = "."
+
+    strata = ["Type", "Indel_Length", "CHROM"]
+
+    chroms = None if (df["CHROM"] == ".").all() else df["CHROM"].to_numpy()
+
+    def read_regions(bed_file):
+        bed = read_bed(bed_file)
+        if chroms is None and bed["CHROM"].nunique() > 1:
+            print(f"Warning: The variants have no CHROM, intervals of all {bed['CHROM'].nunique()} contigs "
+                  f"in {bed_file} are applied to every variant")
+        return bed
+
+    for bed_file in bed_files or []:
+        name = os.path.splitext(os.path.basename(bed_file))[0]
+        inside = in_regions(chroms, df["POS"].to_numpy(), read_regions(bed_file))
+        df[f"BED_{name}"] = np.where(inside, "inside", "outside")
+        strata.append(f"BED_{name}")
+
+    if mappability_bed:
+        low = in_regions(chroms, df["POS"].to_numpy(), read_regions(mappability_bed))
+        df["Mappability"] = np.where(low, "low", "unique")
+        strata.append("Mappability")
+
+    return df, strata
+
+
+def add_rates(counts):
+
+    """add precision, recall and F1 to a table with TP, FP and FN columns"""
+
+    for column in ["TP", "FP", "FN"]:
+        if column not in counts.columns:
+            counts[column] = 0
+
+    tp = counts["TP"].to_numpy(dtype=float)
+    fp = counts["FP"].to_numpy(dtype=float)
+    fn = counts["FN"].to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = tp / (tp + fp)
+        recall = tp / (tp + fn)
+        f1 = 2 * precision * recall / (precision + recall)
+
+    counts["Precision"] = precision
+    counts["Recall"] = recall
+    counts["F1"] = f1
+    return counts[["TP", "FP", "FN", "Precision", "Recall", "F1"]]
+
+
+def stratified_counts(df, column):
+
+    """count TP/FP/FN per value of a stratification column"""
+
+    counts = df.groupby([column, "Class"], sort=True).size().unstack("Class", fill_value=0)
+    counts.index.name = "Stratum"
+    counts.columns.name = None
+    return add_rates(counts)
+
+
+def concordance_metrics(comparison, bed_files=None, mappability_bed=None):
+
+    """compute overall and stratified TP/FP/FN, precision, recall and F1
+        return a table with one row per (Stratifier, Stratum)"""
+
+    df = load_comparison(comparison)
+    df, strata = annotate_strata(df, bed_files, mappability_bed)
+
+    df["All"] = "all"
+    tables = []
+    for column in ["All"] + strata:
+        table = stratified_counts(df, column).reset_index()
+        table.insert(0, "Stratifier", column)
+        tables.append(table)
+
+    metrics = pd.concat(tables, ignore_index=True)
+    metrics["Stratum"] = metrics["Stratum"].astype(str)
+    return metrics
+
+
+def genotype_category(alleles, ref):
+
+    """classify extracted alleles as missing, REF or ALT"""
+
+    alleles = alleles.astype(str)
+    return np.where(alleles == "missing", "missing", np.where(alleles == ref.astype(str), "REF", "ALT"))
+
+
+def genotype_concordance(genotype_table, caller_a=None, caller_b=None):
+
+    """build the genotype concordance matrix of two callers
+        genotype_table is the csv written by the part 2 pipeline, e.g. merged_Ecoli.csv
+        callers default to the two sample columns after CHROM, POS, REF and ALT,
+        sites where both callers report different ALT alleles are ALT_mismatch for both,
+        so the REF/REF and ALT/ALT cells add up to the concordant sites"""
+
+    if isinstance(genotype_table, pd.DataFrame):
+        df = genotype_table
+    else:
+        df = pd.read_csv(genotype_table, dtype=str, keep_default_na=False)
+
+    samples = [c for c in df.columns if c not in ("CHROM", "POS", "REF", "ALT")]
+    caller_a = caller_a or samples[0]
+    caller_b = caller_b or samples[1]
+
+    category_a = genotype_category(df[caller_a].to_numpy(), df["REF"].to_numpy())
+    category_b = genotype_category(df[caller_b].to_numpy(), df["REF"].to_numpy())
+
+    alt_mismatch = (category_a == "ALT") & (category_b == "ALT") & (df[caller_a].to_numpy() != df[caller_b].to_numpy())
+    category_a = np.where(alt_mismatch, "ALT_mismatch", category_a)
+    category_b = np.where(alt_mismatch, "ALT_mismatch", category_b)
+
+    order = ["REF", "ALT", "ALT_mismatch", "missing"]
+    matrix = pd.crosstab(
+        pd.Categorical(category_a, categories=order),
+        pd.Categorical(category_b, categories=order),
+        rownames=[caller_a], colnames=[caller_b], dropna=False
+    )
+
+    both_called = (category_a != "missing") & (category_b != "missing")
+    same_allele = both_called & (df[caller_a].to_numpy() == df[caller_b].to_numpy())
+    called = int(both_called.sum())
+
+    summary = {
+        "caller_a": caller_a,
+        "caller_b": caller_b,
+        "sites": int(len(df)),
+        "called_by_both": called,
+        "concordant": int(same_allele.sum()),
+        "alt_mismatch": int(alt_mismatch.sum()),
+        "concordance": float(same_allele.sum() / called) if called else None
+    }
+    return matrix, summary
+
+
+def to_records(table):
+
+    """convert a metrics table to json-ready records, NaN becomes null"""
+
+    table = table.astype(object).where(pd.notna(table), None)
+    return table.to_dict(orient="records")
+
+
+def write_report(metrics, json_file, table_file, genotype=None):
+
+    """write metrics as json and as a csv table
+        genotype is the optional (matrix, summary) returned by genotype_concordance"""
+
+    metrics.to_csv(table_file, index=False)
+
+    report = {"metrics": to_records(metrics)}
+    if genotype is not None:
+        matrix, summary = genotype
+        report["genotype_concordance"] = summary
+        report["genotype_matrix"] = {
+            str(row): {str(col): int(matrix.loc[row, col]) for col in matrix.columns}
+            for row in matrix.index
+        }
+
+    with open(json_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Saved {json_file}")
+    print(f"Saved {table_file}")
+
+
+if __name__ == "__main__":
+    metrics = concordance_metrics("merged_result.csv")
+    print(metrics.to_string(index=False))
+    write_report(metrics, "concordance_metrics.json", "concordance_metrics.csv")
@@ -3,9 +3,17 @@ import re
 import csv
 
 class SafeStringEditor:
-    def __init__(self, original_string):
+    def __init__(self, original_string, allowed_positions=None):
         self.string = original_string
         self.original_string = original_string
+
+        # optional per-base flags of the original sequence, mutations are only placed where it is true
+        # e.g. mappability.genome_mappability() to avoid repeats, or its inverse to target them
+        if allowed_positions is not None and len(allowed_positions) != len(original_string):
+            raise ValueError(
+                f"allowed_positions has {len(allowed_positions)} flags for a sequence of {len(original_string)} bases"
+            )
+        self.allowed_positions = allowed_positions
         
         # insert markers to wrap insertion
         self.marker_prefix = "<<<IN_"
@@ -28,8 +36,12 @@ class SafeStringEditor:
             return self
 
         seq = list(self.string)
-        count = min(count, len(seq))
-        positions = random.sample(range(len(seq)), count)
+        if self.allowed_positions is None:
+            candidates = range(len(seq))
+        else:
+            candidates = [i for i in range(len(seq)) if self.allowed_positions[i]]
+        count = min(count, len(candidates))
+        positions = random.sample(candidates, count)
 
         replace_char = {
             "A": "@",
@@ -135,6 +147,32 @@ class SafeStringEditor:
         safe_positions.extend(range(last_end, len(self.string) + 1))
         return safe_positions
 
+    def get_original_positions(self):
+        
+        """get the original position of every current string position in one pass
+            marker positions are None, the end of the string maps to the end of the original sequence"""
+        
+        marker_positions = self.get_marker_positions()
+        original_positions = []
+        mapping_index = 0
+        for i in range(len(self.string) + 1):
+            if i in marker_positions:
+                original_positions.append(None)
+                continue
+            if mapping_index < len(self.position_mapping):
+                original_positions.append(self.position_mapping[mapping_index])
+            else:
+                original_positions.append(len(self.original_string))
+            mapping_index += 1
+        return original_positions
+
+    def is_allowed(self, original_pos):
+        if self.allowed_positions is None:
+            return True
+        if original_pos is None or original_pos >= len(self.allowed_positions):
+            return False
+        return bool(self.allowed_positions[original_pos])
+
     def get_actual_position(self, string_pos):
         
         """get the actual position in original sequence for current string position"""
@@ -142,7 +180,8 @@ class SafeStringEditor:
         mapping_index = self.string_pos_to_mapping_index(string_pos)
         if mapping_index < len(self.position_mapping):
             return self.position_mapping[mapping_index]
-        return mapping_index
+        # the end of the string is the end of the original sequence, even after deletions
+        return len(self.original_string)
 
     def insert_random(self, sequence):
        
@@ -150,6 +189,13 @@ class SafeStringEditor:
         
         safe_positions = self.get_safe_insertion_ranges()
 
+        if self.allowed_positions is not None:
+            original_positions = self.get_original_positions()
+            safe_positions = [p for p in safe_positions if self.is_allowed(original_positions[p])]
+            if not safe_positions:
+                print("Warning: No allowed positions for insertion")
+                return None
+
         pos = random.choice(safe_positions)
         marked_seq = f"{self.marker_prefix}{self.insert_counter}{self.marker_suffix}{sequence}{self.marker_prefix}{self.insert_counter}_END{self.marker_suffix}"
         self.string = self.string[:pos] + marked_seq + self.string[pos:]
@@ -176,6 +222,12 @@ class SafeStringEditor:
             if char in self.protected_chars:
                 unsafe_positions.add(i)
 
+        if self.allowed_positions is not None:
+            original_positions = self.get_original_positions()
+            for i in range(len(self.string)):
+                if i not in unsafe_positions and not self.is_allowed(original_positions[i]):
+                    unsafe_positions.add(i)
+
         safe_ranges = []
         current_start = None
 
@@ -225,6 +277,7 @@ class SafeStringEditor:
                 start_mapping_index = self.string_pos_to_mapping_index(actual_start)
                 end_mapping_index = self.string_pos_to_mapping_index(actual_end)
 
+                deleted_positions = self.position_mapping[start_mapping_index:end_mapping_index]
                 del self.position_mapping[start_mapping_index:end_mapping_index]
 
                 self.string = self.string[:actual_start] + self.string[actual_end:]
@@ -233,6 +286,7 @@ class SafeStringEditor:
                     "type": "delete",
                     "position": actual_pos,
                     "deleted_chars": deleted_chars,
+                    "deleted_positions": deleted_positions,
                     "length": len(deleted_chars)
                 })
                 return actual_pos
@@ -273,11 +327,12 @@ class SafeStringEditor:
         result = re.sub(pattern_end, "", result)
         return result
 
-    def generate_report(self):
+    def generate_report(self, genome_file="simulated_mutated_genome.txt"):
         
         """generate a report of the mutations
             record positions of mutations
-            record types of mutations"""
+            record types of mutations
+            the final genome is written to genome_file unless it is None"""
         
         report = []
         report.append(f"{'Operation':<12} {'POS':<10} {'REF':<50} {'ALT':<50}")
@@ -329,8 +384,9 @@ class SafeStringEditor:
             alt_display = op["alt"] if len(op["alt"]) <= 50 else op["alt"][:47] + "..."
             report.append(f"{op['type']:<12} {op['position']:<10} {ref_display:<50} {alt_display:<50}")
 
-        with open("simulated_mutated_genome.txt", "w") as f:
-            f.write(self.get_final_string())
+        if genome_file is not None:
+            with open(genome_file, "w") as f:
+                f.write(self.get_final_string())
 
         return "\n".join(report)
 
@@ -347,6 +403,22 @@ def read_fasta_sequence(fasta_file):
         print(f"Error: File {fasta_file} not found")
         return None
 
+def write_report_csv(report, csv_file):
+
+    """store the mutations of the report in a csv file"""
+
+    # the report has fixed-width columns, so an empty REF or ALT at position 0 keeps its column
+    columns = [(0, 12), (13, 23), (24, 74), (75, None)]
+
+    with open(csv_file, "w", newline="") as f:
+        lines = [[line[start:end].strip() for start, end in columns] for line in report.split("\n") if line]
+        header = lines[0] if lines else []
+        data = lines[1:] if len(lines) > 1 else []
+
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(data)
+
 if __name__ == "__main__":
     original = read_fasta_sequence("reference_genome.fasta")
     editor = SafeStringEditor(original)
@@ -357,14 +429,6 @@ if __name__ == "__main__":
     report = editor.generate_report()
     print(report)
 
-    """store the mutations in a csv file"""
-    with open("simulated_mutated_genome.csv", "w", newline="") as f:
-        lines = [line.split() for line in report.split("\n") if line]
-        header = lines[0] if lines else []
-        data = lines[1:] if len(lines) > 1 else []
-
-        writer = csv.writer(f)
-        writer.writerow(header)
-        writer.writerows(data)
+    write_report_csv(report, "simulated_mutated_genome.csv")
 
 
@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+
+# 2-bit base codes, anything else (N, IUPAC codes) is 4 and makes the k-mer ambiguous
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _base, _code in zip("ACGT", range(4)):
+    BASE_CODES[ord(_base)] = _code
+    BASE_CODES[ord(_base.lower())] = _code
+
+# k-mers up to 32 bases fit exactly in 64 bits, longer ones are hashed with an odd multiplier
+EXACT_KMER_LIMIT = 32
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def read_fasta_contigs(fasta_file):
+
+    """read all contigs of a fasta file as (name, sequence) pairs"""
+
+    contigs = []
+    name = None
+    sequence = []
+
+    with open(fasta_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                if name is not None:
+                    contigs.append((name, "".join(sequence)))
+                name = line[1:].split()[0] if len(line) > 1 else f"contig_{len(contigs) + 1}"
+                sequence = []
+            else:
+                sequence.append(line)
+
+    if name is not None:
+        contigs.append((name, "".join(sequence)))
+    return contigs
+
+
+def encode_sequence(sequence):
+
+    """pack a sequence into an array of 2-bit base codes (4 for ambiguous bases)"""
+
+    return BASE_CODES[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+
+
+def rolling_hashes(codes, k):
+
+    """hash every k-mer of a code array with vectorized rolling updates over the k offsets"""
+
+    count = len(codes) - k + 1
+    multiplier = np.uint64(4) if k <= EXACT_KMER_LIMIT else HASH_MULTIPLIER
+    values = np.where(codes == 4, 0, codes).astype(np.uint64)
+
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(k):
+        hashes *= multiplier
+        hashes += values[offset:offset + count]
+    return hashes
+
+
+def canonical_kmer_hashes(codes, k):
+
+    """hash the canonical (forward or reverse complement) k-mer at every start position
+        return the hashes and a mask of k-mers without ambiguous bases"""
+
+    count = len(codes) - k + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+
+    forward = rolling_hashes(codes, k)
+
+    reverse_codes = np.where(codes == 4, 4, 3 - codes)[::-1]
+    reverse = rolling_hashes(reverse_codes, k)[::-1]
+
+    ambiguous = np.concatenate(([0], np.cumsum(codes == 4)))
+    valid = (ambiguous[k:] - ambiguous[:count]) == 0
+
+    return np.minimum(forward, reverse), valid
+
+
+def compute_mappability(contigs, k):
+
+    """flag bases covered by at least one k-mer that occurs once in the genome (both strands)
+        return a dict of contig name to boolean array, True means uniquely mappable"""
+
+    hashes = []
+    valids = []
+    for _, sequence in contigs:
+        contig_hashes, valid = canonical_kmer_hashes(encode_sequence(sequence), k)
+        hashes.append(contig_hashes)
+        valids.append(valid)
+
+    all_hashes = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64)
+    all_valid = np.concatenate(valids) if valids else np.zeros(0, dtype=bool)
+
+    _, inverse, counts = np.unique(all_hashes[all_valid], return_inverse=True, return_counts=True)
+    unique_start = np.zeros(len(all_hashes), dtype=bool)
+    unique_start[all_valid] = counts[inverse] == 1
+
+    masks = {}
+    offset = 0
+    for (name, sequence), contig_hashes in zip(contigs, hashes):
+        starts = unique_start[offset:offset + len(contig_hashes)]
+        offset += len(contig_hashes)
+
+        # a unique k-mer starting at i covers bases i .. i+k-1
+        coverage = np.zeros(len(sequence) + 1, dtype=np.int32)
+        coverage[:len(starts)] += starts
+        coverage[k:k + len(starts)] -= starts
+        masks[name] = np.cumsum(coverage[:len(sequence)]) > 0
+
+    return masks
+
+
+def mask_to_intervals(mask):
+
+    """convert a boolean array into 0-based half-open (start, end) intervals of True runs"""
+
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def write_low_mappability_bed(masks, bed_file):
+
+    """write the bases without a unique k-mer as BED intervals"""
+
+    with open(bed_file, "w") as f:
+        for name, mask in masks.items():
+            starts, ends = mask_to_intervals(~mask)
+            for start, end in zip(starts, ends):
+                f.write(f"{name}\t{start}\t{end}\n")
+
+    print(f"Saved {bed_file}")
+
+
+def cache_path(fasta_file, k):
+    return f"{fasta_file}.k{k}.mappability.npz"
+
+
+def load_mappability(fasta_file, k=100):
+
+    """load the mappability bitmap cached next to the fasta, computing it when missing or stale"""
+
+    cache_file = cache_path(fasta_file, k)
+
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(fasta_file):
+        with np.load(cache_file) as cached:
+            names = cached["names"].tolist()
+            lengths = cached["lengths"]
+            bits = np.unpackbits(cached["bits"], count=int(lengths.sum())).astype(bool)
+        ends = np.cumsum(lengths)
+        return {name: bits[end - length:end] for name, length, end in zip(names, lengths, ends)}
+
+    masks = compute_mappability(read_fasta_contigs(fasta_file), k)
+
+    names = list(masks)
+    lengths = np.array([len(masks[name]) for name in names], dtype=np.int64)
+    bits = np.packbits(np.concatenate([masks[name] for name in names])) if names else np.zeros(0, np.uint8)
+    try:
+        np.savez_compressed(cache_file, names=np.array(names), lengths=lengths, bits=bits)
+    except OSError as e:
+        print(f"Warning: Can NOT write mappability cache {cache_file} - {e}")
+
+    return masks
+
+
+def genome_mappability(fasta_file, k=100):
+
+    """mappability of the contigs joined in file order
+        matches read_fasta_sequence coordinates only for a single-contig fasta,
+        read_fasta_sequence keeps the header lines of later contigs in the sequence"""
+
+    masks = load_mappability(fasta_file, k)
+    return np.concatenate(list(masks.values())) if masks else np.zeros(0, dtype=bool)
+
+
+if __name__ == "__main__":
+    write_low_mappability_bed(load_mappability("reference_genome.fasta", k=100), "low_mappability.bed")
@@ -25,7 +25,7 @@ def read_vcf(vcf_file):
                     "Source": "bcftools"
                 })
 
-    return pd.DataFrame(vcf_data)
+    return pd.DataFrame(vcf_data, columns=["CHROM", "POS", "REF", "ALT", "Type", "Source"])
 
 def read_csv(csv_file):
     df = pd.read_csv(csv_file)
@@ -43,15 +43,41 @@ def read_csv(csv_file):
     )
     df_renamed["Source"] = "CSV"
 
-    return df_renamed[["POS", "REF", "ALT", "Type", "Source"]]
+    # the csv written by make_mutation_genome.py has no CHROM column, merge_and_compare fills it in
+    columns = ["CHROM"] if "CHROM" in df_renamed.columns else []
+    return df_renamed[columns + ["POS", "REF", "ALT", "Type", "Source"]]
 
-def merge_and_compare(vcf_file, csv_file, output_file):
+def default_truth_chrom(vcf_df):
+
+    """contig of a truth csv without CHROM column: the only contig of the VCF calls"""
+
+    contigs = vcf_df["CHROM"].unique()
+    if len(contigs) == 0:
+        return "."
+    if len(contigs) == 1:
+        return contigs[0]
+    return None
+
+def merge_and_compare(vcf_file, csv_file, output_file, truth_chrom=None):
+
+    """compare bcftools calls with the simulated mutations
+        csv_file can also be a table already returned by read_csv,
+        truth_chrom is the contig of a csv without CHROM column (default: the only VCF contig)"""
 
     vcf_df = read_vcf(vcf_file)
-    csv_df = read_csv(csv_file)
+    csv_df = csv_file.copy() if isinstance(csv_file, pd.DataFrame) else read_csv(csv_file)
+
+    if "CHROM" not in csv_df.columns:
+        truth_chrom = truth_chrom or default_truth_chrom(vcf_df)
+        if truth_chrom is None:
+            print("Error: The VCF has several contigs and the csv has no CHROM column, set truth_chrom")
+            return None
+        csv_df.insert(0, "CHROM", truth_chrom)
 
-    vcf_df["variant_key"] = vcf_df["POS"].astype(str) + "_" + vcf_df["REF"] + "_" + vcf_df["ALT"]
-    csv_df["variant_key"] = csv_df["POS"].astype(str) + "_" + csv_df["REF"] + "_" + csv_df["ALT"]
+    for df in (vcf_df, csv_df):
+        df["variant_key"] = (
+            df["CHROM"].astype(str) + "_" + df["POS"].astype(str) + "_" + df["REF"].astype(str) + "_" + df["ALT"].astype(str)
+        )
 
     vcf_keys = set(vcf_df["variant_key"])
     csv_keys = set(csv_df["variant_key"])
@@ -65,6 +91,7 @@ def merge_and_compare(vcf_file, csv_file, output_file):
     for key in matched_keys:
         row = vcf_df[vcf_df["variant_key"] == key].iloc[0]
         result_rows.append({
+            "CHROM": row["CHROM"],
             "POS": row["POS"],
             "REF": row["REF"],
             "ALT": row["ALT"],
@@ -76,6 +103,7 @@ def merge_and_compare(vcf_file, csv_file, output_file):
     for key in vcf_only_keys:
         row = vcf_df[vcf_df["variant_key"] == key].iloc[0]
         result_rows.append({
+            "CHROM": row["CHROM"],
             "POS": row["POS"],
             "REF": row["REF"],
             "ALT": row["ALT"],
@@ -87,6 +115,7 @@ def merge_and_compare(vcf_file, csv_file, output_file):
     for key in csv_only_keys:
         row = csv_df[csv_df["variant_key"] == key].iloc[0]
         result_rows.append({
+            "CHROM": row["CHROM"],
             "POS": row["POS"],
             "REF": row["REF"],
             "ALT": row["ALT"],
@@ -95,8 +124,10 @@ def merge_and_compare(vcf_file, csv_file, output_file):
             "Source": "CSV_only"
         })
 
-    result_df = pd.DataFrame(result_rows)
-    result_df = result_df.sort_values("POS").reset_index(drop=True)
+    result_df = pd.DataFrame(
+        result_rows, columns=["CHROM", "POS", "REF", "ALT", "Type", "Match_Status", "Source"]
+    )
+    result_df = result_df.sort_values(["CHROM", "POS"]).reset_index(drop=True)
     result_df.to_csv(output_file, index=False)
 
     return result_df
@@ -0,0 +1,267 @@
+import csv
+import random
+
+def genome_to_paired_reads(genome_file, output_prefix, read_length=100, num_reads=None,
+                           coverage=30, quality_score="I", insert_size=300):
+    
+    """prepare paired-end reads based on simulated mutated genome
+        genome_file can be a genome file path or a sliceable genome, e.g. VirtualMutatedGenome"""
+                             
+    if isinstance(genome_file, str):
+        genome_seq = read_genome(genome_file)
+    else:
+        genome_seq = genome_file
+
+    if not genome_seq:
+        print("Error: Can NOT read fasta file")
+        return
+
+    genome_length = len(genome_seq)
+
+    if num_reads is None:
+        num_reads = int((genome_length * coverage) / (read_length * 2))
+
+    reads_r1 = []
+    reads_r2 = []
+    read_count = 0
+
+    while read_count < num_reads:
+        max_start = max(0, genome_length - insert_size - read_length)
+        if max_start <= 0:
+            break
+
+        start_pos = random.randint(0, max_start)
+
+        read_pair = make_read_pair(genome_seq, start_pos, read_count + 1, read_length, quality_score, insert_size)
+        if read_pair is None:
+            continue
+
+        reads_r1.append(read_pair[0])
+        reads_r2.append(read_pair[1])
+        read_count += 1
+
+    r1_file = f"{output_prefix}_R1.fastq"
+    r2_file = f"{output_prefix}_R2.fastq"
+
+    write_fastq(r1_file, reads_r1)
+    write_fastq(r2_file, reads_r2)
+
+    print(f"Saved {r1_file}")
+    print(f"Saved {r2_file}")
+
+    return read_count
+
+
+def make_read_pair(genome_seq, start_pos, read_number, read_length, quality_score, insert_size):
+
+    """make read 1 at start_pos and reverse-complemented read 2 one insert size downstream
+        return None when either read runs past the genome end"""
+
+    read1_seq = genome_seq[start_pos:start_pos + read_length]
+    if len(read1_seq) != read_length:
+        return None
+
+    read2_start = start_pos + insert_size
+    read2_seq = genome_seq[read2_start:read2_start + read_length]
+    if len(read2_seq) != read_length:
+        return None
+
+    read2_seq = reverse_complement(read2_seq)
+
+    read_id = f"read_{read_number}"
+
+    read1 = {
+        "id": f"{read_id}/1",
+        "sequence": read1_seq,
+        "quality": quality_score * len(read1_seq)
+    }
+
+    read2 = {
+        "id": f"{read_id}/2",
+        "sequence": read2_seq,
+        "quality": quality_score * len(read2_seq)
+    }
+
+    return read1, read2
+
+
+def read_target_windows(target_file, reference_length, flank=500, chrom=None):
+
+    """read target regions in 0-based reference coordinates, widened by flank and merged
+        target_file is the mutation csv from make_mutation_genome.py or a BED file
+        when chrom is given, BED regions on other contigs are skipped"""
+
+    windows = []
+    other_contigs = {}
+
+    with open(target_file, "r", newline="") as f:
+        if target_file.endswith(".csv"):
+            for row in csv.DictReader(f):
+                start = int(row["POS"]) - 1
+                windows.append((start, start + max(1, len(row["REF"] or ""))))
+        else:
+            for line in f:
+                if not line.strip() or line.startswith(("#", "track", "browser")):
+                    continue
+                cols = line.split("\t")
+                if chrom is not None and cols[0] != chrom:
+                    other_contigs[cols[0]] = other_contigs.get(cols[0], 0) + 1
+                    continue
+                windows.append((int(cols[1]), int(cols[2])))
+
+    if other_contigs:
+        skipped = ", ".join(f"{contig} ({count})" for contig, count in sorted(other_contigs.items()))
+        print(f"Warning: Skipped target regions not on {chrom}: {skipped}")
+        if not windows:
+            print(f"Error: No target regions on {chrom} in {target_file}")
+            return None
+
+    merged = []
+    for start, end in sorted(windows):
+        start = max(0, start - flank)
+        end = min(reference_length, end + flank)
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    return [(start, end) for start, end in merged]
+
+
+def write_regions_bed(windows, chrom, bed_file):
+
+    """write target windows as BED, usable as `bcftools mpileup -R regions.bed`"""
+
+    with open(bed_file, "w") as f:
+        for start, end in windows:
+            f.write(f"{chrom}\t{start}\t{end}\n")
+
+    print(f"Saved {bed_file}")
+
+
+def genome_to_targeted_paired_reads(genome, windows, output_prefix, read_length=100, coverage=30,
+                                    quality_score="I", insert_size=300):
+
+    """prepare paired-end reads at full depth only over target windows
+        genome is a VirtualMutatedGenome and windows are 0-based reference coordinates,
+        fragment starts extend one fragment length before each window so its edges reach full depth,
+        and start ranges of windows closer than one fragment are merged so no start is sampled twice"""
+
+    genome_length = len(genome)
+    fragment_length = insert_size + read_length
+    max_start = genome_length - fragment_length
+
+    if max_start <= 0:
+        print("Error: Genome is shorter than one fragment")
+        return None
+
+    start_ranges = []
+    for ref_start, ref_end in sorted(windows):
+        start = genome.to_mutated_position(ref_start)
+        end = genome.to_mutated_position(ref_end)
+
+        first_start = max(0, start - fragment_length + 1)
+        last_start = min(max_start, end - 1)
+        if last_start < first_start:
+            continue
+
+        if start_ranges and first_start <= start_ranges[-1][1] + 1:
+            start_ranges[-1][1] = max(start_ranges[-1][1], last_start)
+        else:
+            start_ranges.append([first_start, last_start])
+
+    reads_r1 = []
+    reads_r2 = []
+    read_count = 0
+
+    for first_start, last_start in start_ranges:
+        range_reads = int(((last_start - first_start + 1) * coverage) / (read_length * 2))
+
+        for _ in range(range_reads):
+            start_pos = random.randint(first_start, last_start)
+            read_pair = make_read_pair(genome, start_pos, read_count + 1, read_length, quality_score, insert_size)
+            if read_pair is None:
+                continue
+
+            reads_r1.append(read_pair[0])
+            reads_r2.append(read_pair[1])
+            read_count += 1
+
+    r1_file = f"{output_prefix}_R1.fastq"
+    r2_file = f"{output_prefix}_R2.fastq"
+
+    write_fastq(r1_file, reads_r1)
+    write_fastq(r2_file, reads_r2)
+
+    print(f"Saved {r1_file}")
+    print(f"Saved {r2_file}")
+
+    return read_count
+
+
+def read_genome_name(genome_file):
+
+    """get the sequence name from the first fasta header, None for a plain txt genome"""
+
+    with open(genome_file, "r") as f:
+        for line in f:
+            if line.startswith(">"):
+                return line[1:].split()[0]
+            if line.strip():
+                return None
+    return None
+
+
+def read_genome(genome_file):
+  
+    """read genome file
+        can be used on both txt and fasta files"""
+  
+    sequence = []
+
+    try:
+        with open(genome_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith(">"):
+                    continue
+                sequence.append(line)
+
+        if not sequence:
+            print("Error：Can NOT Find Sequence")
+            return None
+
+        return "".join(sequence).upper()
+
+    except FileNotFoundError:
+        print(f"Error：Can NOT Find File {genome_file}")
+        return None
+
+    except Exception as e:
+        print(f"Error：Reading Files - {e}")
+        return None
+
+def reverse_complement(seq):
+    complement = {"A": "T", "T": "A", "G": "C", "C": "G", "N": "N"}
+    return "".join(complement.get(base, "N") for base in reversed(seq))
+
+def write_fastq(output_file, reads):
+    with open(output_file, "w") as f:
+        for read in reads:
+            if len(read["sequence"]) != len(read["quality"]):
+                print(f"Warning: {read['id']} Sequence Length and Quality Score Length Do NOT Match")
+                continue
+
+            f.write(f"@{read['id']}\n")
+            f.write(f"{read['sequence']}\n")
+            f.write("+\n")
+            f.write(f"{read['quality']}\n")
+
+if __name__ == "__main__":
+    genome_to_paired_reads(
+        "simulated_mutated_genome.txt",
+        "simulated_read",
+        read_length=100,
+        coverage=30,
+        insert_size=300
+    )
@@ -0,0 +1,228 @@
+import bisect
+import csv
+
+
+def deletion_starts_by_end(deletions):
+    return {start + length: start for start, length, _ in deletions}
+
+
+def anchor_insertion(pos, deletion_starts):
+
+    """move an insertion at pos in front of the deletions that end right before it
+        the inserted bases then sort before those deletions and next to insertions at the same place"""
+
+    while pos in deletion_starts:
+        pos = deletion_starts[pos]
+    return pos
+
+
+class VirtualMutatedGenome:
+
+    """mutated genome backed by the reference sequence and a sorted edit list
+        slices are stitched together from reference segments and edited bases,
+        so the full mutated genome is never written out or held in memory"""
+
+    def __init__(self, reference, edits):
+        self.reference = reference
+
+        # each edit replaces `length` reference bases starting at 0-based `start` with `sequence`
+        # SNP: (pos, 1, alt), insertion: (pos, 0, inserted bases), deletion: (pos, length, "")
+        # edits at the same position keep their given order, overlapping edits raise ValueError
+        self.edits = sorted(edits, key=lambda edit: (edit[0], edit[1] > 0))
+
+        # pieces are either ("ref", ref_start, ref_end) or ("seq", sequence)
+        # piece_starts holds the mutated coordinate where each piece begins
+        self.pieces = []
+        self.piece_starts = []
+        self.length = 0
+
+        # applied edits and the length change before each of them, used to map reference positions
+        self.applied_edits = []
+        self.shift_before = []
+
+        ref_pos = 0
+        shift = 0
+        for start, length, sequence in self.edits:
+            if start < ref_pos:
+                raise ValueError(f"Edit at {start} overlaps the previous edit ending at {ref_pos}")
+            if start + length > len(reference):
+                raise ValueError(f"Edit at {start} is outside the reference of length {len(reference)}")
+
+            self._add_piece(("ref", ref_pos, start), start - ref_pos)
+            self._add_piece(("seq", sequence), len(sequence))
+            ref_pos = min(start + length, len(reference))
+
+            self.applied_edits.append((start, ref_pos - start, sequence))
+            self.shift_before.append(shift)
+            shift += len(sequence) - (ref_pos - start)
+
+        self.edit_starts = [edit[0] for edit in self.applied_edits]
+
+        self._add_piece(("ref", ref_pos, len(reference)), len(reference) - ref_pos)
+
+    def _add_piece(self, piece, piece_length):
+        if piece_length <= 0:
+            return
+        self.pieces.append(piece)
+        self.piece_starts.append(self.length)
+        self.length += piece_length
+
+    @classmethod
+    def from_editor(cls, editor):
+
+        """build the virtual genome from a SafeStringEditor after restore_snps
+            uses the recorded SNPs and indels instead of the edited string,
+            str() of the result equals editor.get_final_string()"""
+
+        edits = []
+        for snp in editor.snp_records:
+            edits.append((snp["position"], 1, snp["alt"]))
+
+        deletions = []
+        for op in editor.operations_log:
+            if op["type"] != "insert":
+                # a deletion can span bases removed by an earlier deletion,
+                # so split it into runs of contiguous original positions
+                run_start = None
+                previous = None
+                for pos in op["deleted_positions"]:
+                    if run_start is not None and pos != previous + 1:
+                        deletions.append((run_start, previous + 1 - run_start, ""))
+                        run_start = None
+                    if run_start is None:
+                        run_start = pos
+                    previous = pos
+                if run_start is not None:
+                    deletions.append((run_start, previous + 1 - run_start, ""))
+        edits.extend(deletions)
+
+        # insertions at the same position keep the order of their markers in the edited string
+        deletion_starts = deletion_starts_by_end(deletions)
+        insertions = []
+        for op in editor.operations_log:
+            if op["type"] == "insert":
+                marker = f"{editor.marker_prefix}{len(insertions)}{editor.marker_suffix}"
+                insertions.append((editor.string.find(marker), op))
+        for _, op in sorted(insertions, key=lambda item: item[0]):
+            edits.append((anchor_insertion(op["position"], deletion_starts), 0, op["sequence"]))
+
+        return cls(editor.original_string, edits)
+
+    @classmethod
+    def from_report_csv(cls, reference, csv_file):
+
+        """build the virtual genome from the mutation csv written by make_mutation_genome.py
+            SNP positions are 1-based, indel positions are 1-based positions of the anchor base
+
+            the csv keeps less than the editor, so raise ValueError for the mutations it can not represent:
+            a deletion spanning bases already removed by an earlier deletion overlaps it,
+            and several insertions at the same place have no recorded order"""
+
+        edits = []
+        with open(csv_file, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                operation = row["Operation"]
+                pos = int(row["POS"])
+                ref = row["REF"] or ""
+                alt = row["ALT"] or ""
+
+                if operation == "SNP":
+                    edits.append((pos - 1, 1, alt))
+                elif operation == "Insertion":
+                    edits.append((pos, 0, alt[len(ref):]))
+                elif operation == "Deletion":
+                    edits.append((pos, len(ref) - len(alt), ""))
+                else:
+                    raise ValueError(f"Unknown operation {operation} at {pos}")
+
+        deletion_starts = deletion_starts_by_end([edit for edit in edits if edit[1] > 0 and not edit[2]])
+        insertion_positions = set()
+        for i, (start, length, sequence) in enumerate(edits):
+            if length == 0:
+                start = anchor_insertion(start, deletion_starts)
+                if start in insertion_positions:
+                    raise ValueError(f"Several insertions at {start}, their order is not recorded in {csv_file}")
+                insertion_positions.add(start)
+                edits[i] = (start, 0, sequence)
+
+        return cls(reference, edits)
+
+    def to_mutated_position(self, ref_pos):
+
+        """map a 0-based reference position to the mutated genome
+            bases inside a replaced or deleted span map into the edited bases"""
+
+        index = bisect.bisect_right(self.edit_starts, ref_pos)
+        if index == 0:
+            return ref_pos
+
+        start, length, sequence = self.applied_edits[index - 1]
+        shift = self.shift_before[index - 1]
+        if ref_pos < start + length:
+            return start + shift + min(ref_pos - start, len(sequence))
+        return ref_pos + shift + len(sequence) - length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            if key < 0:
+                key += self.length
+            if key < 0 or key >= self.length:
+                raise IndexError("virtual genome index out of range")
+            return self.get_slice(key, key + 1)
+
+        start, stop, step = key.indices(self.length)
+        if step != 1:
+            return self.get_slice(start, stop)[::step]
+        return self.get_slice(start, stop)
+
+    def get_slice(self, start, stop):
+
+        """get mutated genome bases in [start, stop)
+            stitch reference segments and edited bases covering the range"""
+
+        if start >= stop:
+            return ""
+
+        parts = []
+        index = bisect.bisect_right(self.piece_starts, start) - 1
+        pos = start
+
+        while pos < stop and index < len(self.pieces):
+            piece = self.pieces[index]
+            piece_start = self.piece_starts[index]
+            offset = pos - piece_start
+
+            if piece[0] == "ref":
+                ref_start = piece[1] + offset
+                ref_end = min(piece[2], piece[1] + stop - piece_start)
+                parts.append(self.reference[ref_start:ref_end])
+                pos += ref_end - ref_start
+            else:
+                chunk = piece[1][offset:stop - piece_start]
+                parts.append(chunk)
+                pos += len(chunk)
+
+            index += 1
+
+        return "".join(parts)
+
+    def __str__(self):
+        return self.get_slice(0, self.length)
+
+
+if __name__ == "__main__":
+    from simulate_illumina_short_reads import genome_to_paired_reads, read_genome
+
+    reference = read_genome("reference_genome.fasta")
+    if reference:
+        genome = VirtualMutatedGenome.from_report_csv(reference, "simulated_mutated_genome.csv")
+        genome_to_paired_reads(
+            genome,
+            "simulated_read",
+            read_length=100,
+            coverage=30,
+            insert_size=300
+        )
@@ -0,0 +1,252 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+EVIDENCE_COLUMNS = ["DEPTH", "REF_COUNT", "ALT_COUNT", "ALT_FWD", "ALT_REV", "STRAND_BALANCE", "MEAN_MAPQ"]
+
+# bumped when the counting changes, so cached evidence of an older version is not reused
+CACHE_VERSION = 2
+
+
+def read_flagged_sites(input_csv):
+
+    """read the csv written by count_low_confident_variant.py
+        multi-allelic ALT values contain commas, so the columns around ALT are taken by position"""
+
+    with open(input_csv, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) > len(header):
+                row = row[:3] + [",".join(row[3:len(row) - 4])] + row[len(row) - 4:]
+            rows.append(row)
+    return header, rows
+
+
+def site_key(chrom, pos, ref, alt):
+    return f"{chrom}:{pos}:{ref}:{alt}"
+
+
+def group_sites_into_regions(sites, max_gap=1000, max_span=100000):
+
+    """group sorted sites so that nearby sites share one pileup pass
+        sites are (chrom, pos, ref, alt) with 1-based pos"""
+
+    regions = []
+    current = None
+
+    for site in sorted(sites, key=lambda s: (s[0], s[1])):
+        chrom, pos, ref = site[0], site[1], site[2]
+        site_end = pos + len(ref)
+
+        if (current is not None and current["chrom"] == chrom
+                and pos - current["end"] <= max_gap
+                and site_end - current["start"] <= max_span):
+            current["end"] = max(current["end"], site_end)
+            current["sites"].append(site)
+        else:
+            current = {"chrom": chrom, "start": pos, "end": site_end, "sites": [site]}
+            regions.append(current)
+
+    return regions
+
+
+def aligned_bases(pileup_read, ref_pos, length):
+
+    """read bases aligned to `length` reference bases starting at the pileup column ref_pos
+        None when the read ends or has an indel inside the span"""
+
+    read = pileup_read.alignment
+    for block_start, block_end in read.get_blocks():
+        if block_start <= ref_pos < block_end:
+            if ref_pos + length > block_end:
+                return None
+            start = pileup_read.query_position
+            return read.query_sequence[start:start + length].upper()
+    return None
+
+
+def count_site_evidence(column, ref, alts):
+
+    """count read evidence at the pileup column of a VCF site
+        SNPs, MNPs and other equal-length alleles compare the read bases over the whole REF span,
+        indels compare the indel length after the anchor base"""
+
+    evidence = {"DEPTH": 0, "REF_COUNT": 0, "ALT_COUNT": 0, "ALT_FWD": 0, "ALT_REV": 0}
+    mapq_total = 0
+
+    ref = ref.upper()
+    indel_lengths = {len(alt) - len(ref) for alt in alts if len(alt) != len(ref)}
+    span_alts = {alt.upper() for alt in alts if len(alt) == len(ref)}
+    # indel-only sites only check the anchor base for REF
+    span = len(ref) if span_alts else 1
+
+    for pileup_read in column.pileups:
+        if pileup_read.is_refskip:
+            continue
+
+        read = pileup_read.alignment
+        evidence["DEPTH"] += 1
+        mapq_total += read.mapping_quality
+
+        if pileup_read.is_del:
+            continue
+
+        if pileup_read.indel != 0:
+            bases = None
+            is_alt = pileup_read.indel in indel_lengths
+        else:
+            bases = aligned_bases(pileup_read, column.reference_pos, span)
+            is_alt = bases in span_alts
+
+        if is_alt:
+            evidence["ALT_COUNT"] += 1
+            if read.is_reverse:
+                evidence["ALT_REV"] += 1
+            else:
+                evidence["ALT_FWD"] += 1
+        elif bases == ref[:span]:
+            evidence["REF_COUNT"] += 1
+
+    if evidence["ALT_COUNT"]:
+        evidence["STRAND_BALANCE"] = round(min(evidence["ALT_FWD"], evidence["ALT_REV"]) / evidence["ALT_COUNT"], 4)
+    else:
+        evidence["STRAND_BALANCE"] = ""
+    evidence["MEAN_MAPQ"] = round(mapq_total / evidence["DEPTH"], 2) if evidence["DEPTH"] else ""
+    return evidence
+
+
+def pileup_region(bam_file, region):
+
+    """run one pileup pass over a region and collect evidence for all its sites"""
+
+    import pysam
+
+    sites_by_pos = {}
+    for chrom, pos, ref, alt in region["sites"]:
+        sites_by_pos.setdefault(pos - 1, []).append((chrom, pos, ref, alt))
+
+    results = {}
+    with pysam.AlignmentFile(bam_file, "rb") as bam:
+        for column in bam.pileup(
+                region["chrom"], region["start"] - 1, region["end"],
+                truncate=True, min_base_quality=0, max_depth=100000):
+            sites = sites_by_pos.get(column.reference_pos)
+            if not sites:
+                continue
+            for chrom, pos, ref, alt in sites:
+                results[site_key(chrom, pos, ref, alt)] = count_site_evidence(column, ref, alt.split(","))
+
+    # sites without any covering read
+    for chrom, pos, ref, alt in region["sites"]:
+        results.setdefault(site_key(chrom, pos, ref, alt), {
+            "DEPTH": 0, "REF_COUNT": 0, "ALT_COUNT": 0, "ALT_FWD": 0, "ALT_REV": 0,
+            "STRAND_BALANCE": "", "MEAN_MAPQ": ""
+        })
+    return results
+
+
+def bam_cache_key(bam_file):
+
+    """identify a BAM by path, size, modification time and cache version
+        a re-mapped BAM gets a new key so stale evidence is not reused"""
+
+    stat = os.stat(bam_file)
+    return f"{os.path.abspath(bam_file)}:{stat.st_size}:{int(stat.st_mtime)}:v{CACHE_VERSION}"
+
+
+def drop_stale_entries(cache, bam_file, bam_key):
+
+    """remove cached evidence of earlier versions of the same BAM path"""
+
+    prefix = f"{os.path.abspath(bam_file)}:"
+    for key in [key for key in cache if key != bam_key and key.startswith(prefix)]:
+        del cache[key]
+
+
+def load_cache(cache_file):
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Can NOT read cache {cache_file} - {e}", file=sys.stderr)
+        return {}
+
+
+def save_cache(cache_file, cache):
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+
+def annotate_sites(bam_file, sites, threads=4, cache_file=None, max_gap=1000):
+
+    """look up read evidence for every site in the BAM
+        cached sites are skipped, the rest are grouped into regions and piled up in parallel"""
+
+    cache = load_cache(cache_file)
+    bam_key = bam_cache_key(bam_file)
+    bam_cache = cache.setdefault(bam_key, {})
+
+    missing = [site for site in sites if site_key(*site) not in bam_cache]
+    regions = group_sites_into_regions(set(missing), max_gap=max_gap)
+
+    if regions:
+        print(f"Running pileup on {len(regions)} regions for {len(missing)} sites "
+              f"({len(sites) - len(missing)} cached)")
+        if threads > 1 and len(regions) > 1:
+            with ProcessPoolExecutor(max_workers=threads) as executor:
+                for results in executor.map(pileup_region, [bam_file] * len(regions), regions):
+                    bam_cache.update(results)
+        else:
+            for region in regions:
+                bam_cache.update(pileup_region(bam_file, region))
+
+        if cache_file:
+            drop_stale_entries(cache, bam_file, bam_key)
+            save_cache(cache_file, cache)
+
+    return {site_key(*site): bam_cache[site_key(*site)] for site in sites}
+
+
+def annotate_low_confident_variant(input_csv, bam_file, output_csv, threads=4, cache_file=None):
+
+    """add BAM evidence columns to the low confident variant csv"""
+
+    if not os.path.exists(f"{bam_file}.bai") and not os.path.exists(f"{os.path.splitext(bam_file)[0]}.bai"):
+        print(f"Error: {bam_file} is NOT indexed, run samtools index first", file=sys.stderr)
+        return None
+
+    header, rows = read_flagged_sites(input_csv)
+    sites = [(row[0], int(row[1]), row[2], row[3]) for row in rows]
+
+    evidence = annotate_sites(bam_file, sites, threads=threads, cache_file=cache_file)
+
+    with open(output_csv, "w", newline="") as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(header + EVIDENCE_COLUMNS)
+        for row, site in zip(rows, sites):
+            site_evidence = evidence[site_key(*site)]
+            writer.writerow(row + [site_evidence[column] for column in EVIDENCE_COLUMNS])
+
+    print(f"annotated {len(rows)} non_confident variant")
+    print(f"saved to {output_csv}")
+    return evidence
+
+
+if __name__ == "__main__":
+    annotate_low_confident_variant(
+        "not_confident_calls.csv",
+        "Ecoli_mapped_reads.bam",
+        "not_confident_calls_evidence.csv",
+        threads=4,
+        cache_file="Ecoli_mapped_reads.evidence_cache.json"
+    )
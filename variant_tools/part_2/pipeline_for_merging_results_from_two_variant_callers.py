@@ -0,0 +1,444 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_command(cmd_list, description):
+    print(f"Running: {description}")
+
+    try:
+        result = subprocess.run(cmd_list, check=True)
+        print(f"{description} Completed\n")
+        return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error in {description}: {e}", file=sys.stderr)
+        return False
+
+    except FileNotFoundError as e:
+        print(f"Command NOT Found: {e}", file=sys.stderr)
+        return False
+
+
+def run_pipeline(proc1_cmd, proc2_cmd, proc3_cmd, output_file, description):
+    print(f"Running: {description}")
+
+    try:
+        proc1 = subprocess.Popen(proc1_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        proc2 = subprocess.Popen(
+            proc2_cmd,
+            stdin=proc1.stdout,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        proc1.stdout.close()
+
+        with open(output_file, "wb") as f_out:
+            proc3 = subprocess.Popen(
+                proc3_cmd,
+                stdin=proc2.stdout,
+                stdout=f_out,
+                stderr=subprocess.PIPE
+            )
+            proc2.stdout.close()
+
+            proc3.wait()
+            proc2.wait()
+            proc1.wait()
+
+        if proc1.returncode != 0:
+            print(f"Process 1 Error: {proc1.stderr.read().decode()}", file=sys.stderr)
+            return False
+
+        if proc2.returncode != 0:
+            print(f"Process 2 Error: {proc2.stderr.read().decode()}", file=sys.stderr)
+            return False
+
+        if proc3.returncode != 0:
+            print(f"Process 3 Error: {proc3.stderr.read().decode()}", file=sys.stderr)
+            return False
+
+        print(f"{description} Completed successfully")
+        return True
+
+    except Exception as e:
+        print(f"Pipeline Error: {e}", file=sys.stderr)
+        return False
+
+
+# minimap2 | samtools view | samtools sort and bcftools mpileup | bcftools call run at least one thread per process
+MIN_SAMPLE_THREADS = 3
+
+
+def split_mapping_threads(threads):
+
+    """split a thread budget between the processes of minimap2 | samtools view | samtools sort
+        samtools view and the main sort thread take one thread each,
+        return (minimap2 threads, extra samtools sort threads)"""
+
+    rest = max(1, threads - 2)
+    sort_threads = rest // 4
+    return rest - sort_threads, sort_threads
+
+
+def call_variants_bcftools(reference, bam_file, vcf_file, threads=1, compressed=False):
+
+    """call variants with bcftools mpileup | bcftools call
+        the output is bgzipped when compressed is True,
+        both processes take one thread and bcftools call compresses with the rest of threads"""
+
+    print("Running: Call variants with bcftools")
+
+    # mpileup writes uncompressed BCF, so extra threads would only idle
+    compress_threads = max(0, threads - 2) if compressed else 0
+
+    try:
+        mpileup_proc = subprocess.Popen(
+            ["bcftools", "mpileup", "-Ou", "-f", reference, bam_file],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        with open(vcf_file, 'wb') as vcf_out:
+            call_proc = subprocess.Popen(
+                ["bcftools", "call", "--threads", str(compress_threads), "-vc", "-Oz" if compressed else "-Ov"],
+                stdin=mpileup_proc.stdout,
+                stdout=vcf_out,
+                stderr=subprocess.PIPE
+            )
+            mpileup_proc.stdout.close()
+
+            mpileup_stderr = mpileup_proc.communicate()[1].decode()
+            call_stdout, call_stderr = call_proc.communicate()
+
+        if mpileup_proc.returncode != 0:
+            print(f"bcftools mpileup Error:\n{mpileup_stderr}", file=sys.stderr)
+            return False
+
+        if call_proc.returncode != 0:
+            print(f"bcftools call Error:\n{call_stderr.decode()}", file=sys.stderr)
+            return False
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+
+    return True
+
+
+def get_allele(gt, rec):
+
+    if not gt or gt[0] is None:
+        return "missing"
+
+    allele_indices = []
+    if isinstance(gt, (tuple, list)):
+        for allele in gt:
+            if allele is not None:
+                allele_indices.append(allele)
+    else:
+        allele_indices.append(gt)
+
+    if not allele_indices:
+        return "missing"
+
+    non_ref = []
+    for idx in allele_indices:
+        if idx > 0:
+            non_ref.append(idx)
+
+    if non_ref:
+        first_mutation_idx = non_ref[0]
+        return rec.alts[first_mutation_idx - 1]
+    else:
+        return rec.ref
+
+
+def extract_genotypes(merged_vcf, output_csv):
+
+    """extract the allele of every sample in the merged VCF into a csv file"""
+
+    # imported here so the mapping and calling steps do not pay for pandas and pysam
+    import pandas as pd
+    import pysam
+
+    try:
+        vcf = pysam.VariantFile(merged_vcf)
+        records = []
+        samples = list(vcf.header.samples)
+
+        for rec in vcf:
+            row = [rec.chrom, rec.pos, rec.ref, ",".join(rec.alts)]
+
+            for sample in samples:
+                gt = rec.samples[sample].get("GT")
+                allele = get_allele(gt, rec)
+                row.append(allele)
+            records.append(row)
+        vcf.close()
+
+        columns = ["CHROM", "POS", "REF", "ALT"]
+        columns.extend(samples)
+        df = pd.DataFrame(records, columns=columns)
+        df.to_csv(output_csv, index=False)
+
+    except Exception as e:
+        print(f"Error extracting genotypes: {e}", file=sys.stderr)
+        return False
+
+    return True
+
+
+def read_sample_sheet(sample_sheet):
+
+    """read a csv sample sheet with columns sample, read_r1, read_r2"""
+
+    samples = []
+    with open(sample_sheet, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            sample = row["sample"].strip()
+            if not sample:
+                continue
+            samples.append({
+                "sample": sample,
+                "read_r1": row["read_r1"].strip(),
+                "read_r2": row["read_r2"].strip()
+            })
+
+    names = [s["sample"] for s in samples]
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        print(f"Error: Duplicated samples in {sample_sheet}: {', '.join(duplicated)}", file=sys.stderr)
+        return None
+    return samples
+
+
+def build_minimap2_index(reference, index_file, threads=1):
+
+    """build the minimap2 short-read index once
+        an index newer than the reference is reused"""
+
+    if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(reference):
+        print(f"Reusing minimap2 index {index_file}\n")
+        return True
+
+    return run_command(
+        ["minimap2", "-x", "sr", "-t", str(threads), "-d", index_file, reference],
+        "Build minimap2 index"
+    )
+
+
+def sample_stamp(sample, reference):
+
+    """record the reads and reference a sample VCF is made from, by absolute path, size and modification time"""
+
+    stamp = {}
+    for key, path in [("read_r1", sample["read_r1"]), ("read_r2", sample["read_r2"]), ("reference", reference)]:
+        info = os.stat(path)
+        stamp[key] = [os.path.abspath(path), info.st_size, info.st_mtime]
+    return stamp
+
+
+def is_sample_finished(vcf_gz, stamp_file, stamp, reference, index_file):
+
+    """an indexed sample VCF is reused only when it is newer than the reference and minimap2 index,
+        and its stamp file records the same reads and reference"""
+
+    if not (os.path.exists(vcf_gz) and os.path.exists(f"{vcf_gz}.tbi") and os.path.exists(stamp_file)):
+        return False
+    if os.path.getmtime(vcf_gz) < max(os.path.getmtime(reference), os.path.getmtime(index_file)):
+        return False
+    try:
+        with open(stamp_file, "r") as f:
+            return json.load(f) == stamp
+    except ValueError:
+        return False
+
+
+def process_cohort_sample(sample, reference, index_file, cohort_dir, threads):
+
+    """map and call one cohort sample
+        samples with an up-to-date indexed VCF are skipped"""
+
+    name = sample["sample"]
+    sample_dir = os.path.join(cohort_dir, name)
+    bam_file = os.path.join(sample_dir, f"{name}_mapped_reads.bam")
+    vcf_gz = os.path.join(sample_dir, f"{name}_variants_bcf.vcf.gz")
+    stamp_file = os.path.join(sample_dir, f"{name}_inputs.json")
+
+    try:
+        stamp = sample_stamp(sample, reference)
+    except OSError as e:
+        print(f"Error: Can NOT read the inputs of {name}: {e}", file=sys.stderr)
+        return None
+
+    if is_sample_finished(vcf_gz, stamp_file, stamp, reference, index_file):
+        print(f"Skipping {name}: {vcf_gz} is up to date\n")
+        return vcf_gz
+
+    os.makedirs(sample_dir, exist_ok=True)
+    map_threads, sort_threads = split_mapping_threads(threads)
+
+    # read group sets the sample name used by bcftools merge
+    if not run_pipeline(
+            ["minimap2", "-a", "-x", "sr", "-t", str(map_threads), "-R", f"@RG\\tID:{name}\\tSM:{name}",
+             index_file, sample["read_r1"], sample["read_r2"]],
+            ["samtools", "view", "-h", "-F", "0x900", "-"],
+            ["samtools", "sort", "-@", str(sort_threads), "-O", "bam"],
+            bam_file,
+            f"Map reads of {name} with minimap2, and convert/sort the output into a BAM file using samtools."
+    ):
+        return None
+
+    # write to a temporary name so an interrupted call is not mistaken for a finished sample
+    tmp_vcf_gz = os.path.join(sample_dir, f"{name}_variants_bcf.tmp.vcf.gz")
+    if not call_variants_bcftools(reference, bam_file, tmp_vcf_gz, threads=threads, compressed=True):
+        return None
+    os.replace(tmp_vcf_gz, vcf_gz)
+
+    if not run_command(["tabix", "-f", "-p", "vcf", vcf_gz], f"Create tabix index for {name} VCF"):
+        return None
+
+    with open(stamp_file, "w") as f:
+        json.dump(stamp, f)
+
+    return vcf_gz
+
+
+def run_cohort(sample_sheet, reference="Ecoli_complete_genome.fasta", cohort_dir="Ecoli_cohort",
+               total_threads=None, threads_per_sample=4):
+
+    """run mapping and bcftools calling for every sample in the sample sheet
+        the minimap2 and samtools indexes are built once, samples run in parallel within total_threads,
+        and all sample VCFs are merged into one N-sample VCF and genotype table"""
+
+    samples = read_sample_sheet(sample_sheet)
+    if not samples:
+        print(f"Error: No samples found in {sample_sheet}", file=sys.stderr)
+        return False
+
+    total_threads = total_threads or os.cpu_count() or 1
+    threads_per_sample = max(1, min(threads_per_sample, total_threads))
+    # every process of a sample pipe runs at least one thread, even with a smaller per-sample budget
+    parallel_samples = max(1, total_threads // max(threads_per_sample, MIN_SAMPLE_THREADS))
+
+    os.makedirs(cohort_dir, exist_ok=True)
+    index_file = os.path.join(cohort_dir, f"{os.path.basename(reference)}.mmi")
+    if not build_minimap2_index(reference, index_file, threads=total_threads):
+        return False
+
+    # bcftools mpileup -f builds a missing .fai itself, which parallel samples would race on
+    fai_file = f"{reference}.fai"
+    if not (os.path.exists(fai_file) and os.path.getmtime(fai_file) >= os.path.getmtime(reference)):
+        if not run_command(["samtools", "faidx", reference], "Index reference with samtools faidx"):
+            return False
+
+    with ThreadPoolExecutor(max_workers=parallel_samples) as executor:
+        vcf_files = list(executor.map(
+            lambda sample: process_cohort_sample(sample, reference, index_file, cohort_dir, threads_per_sample),
+            samples
+        ))
+
+    failed = [s["sample"] for s, vcf in zip(samples, vcf_files) if vcf is None]
+    if failed:
+        print(f"Error: Failed samples: {', '.join(failed)}", file=sys.stderr)
+        return False
+
+    merged_vcf = os.path.join(cohort_dir, "cohort_merged.vcf.gz")
+    merged_csv = os.path.join(cohort_dir, "cohort_merged.csv")
+
+    if len(vcf_files) == 1:
+        merged_vcf = vcf_files[0]
+    elif not run_command(
+            ["bcftools", "merge", "--threads", str(total_threads - 1), *vcf_files, "-Oz", "-o", merged_vcf],
+            f"Merge {len(vcf_files)} sample VCF files with bcftools"
+    ):
+        return False
+    elif not run_command(["tabix", "-f", "-p", "vcf", merged_vcf], "Create tabix index for merged cohort VCF"):
+        return False
+
+    if not extract_genotypes(merged_vcf, merged_csv):
+        return False
+
+    print(f"Cohort pipeline finished for {len(samples)} samples")
+    return True
+
+
+def main(reference="Ecoli_complete_genome.fasta", read_r1="SRR25083113_1.fastq.gz",
+         read_r2="SRR25083113_2.fastq.gz", prefix="Ecoli"):
+    # File paths
+    reference_bcf = reference
+    bam_file = f"{prefix}_mapped_reads.bam"
+    vcf_bcf = f"{prefix}_variants_bcf.vcf"
+    vcf_bcf_gz = f"{prefix}_variants_bcf.vcf.gz"
+    snippy_dir = f"{prefix}_snippy_results"
+    snippy_vcf_gz = f"{prefix}_snippy_results/snps.vcf.gz"
+    merged_vcf = f"{prefix}_merged.vcf.gz"
+    merged_csv = f"merged_{prefix}.csv"
+
+    # Step 1: Map reads (minimap2 | samtools view | samtools sort)
+    map_pipeline = run_pipeline(
+        ["minimap2", "-a", "-x", "sr", reference, read_r1, read_r2],
+        ["samtools", "view", "-h", "-F", "0x900", "-"],
+        ["samtools", "sort", "-O", "bam"],
+        bam_file,
+        "Map reads with minimap2, and convert/sort the output into a BAM file using samtools."
+    )
+    if not map_pipeline:
+        sys.exit(1)
+
+    # Step 2: Call variants with bcftools
+    if not call_variants_bcftools(reference_bcf, bam_file, vcf_bcf):
+        sys.exit(1)
+
+    # Step 3: Run snippy
+    if not run_command(
+            ["snippy", "--outdir", snippy_dir, "--ref", reference,
+             "--R1", read_r1, "--R2", read_r2, "--mincov", "10", "--minfrac", "0.9"],
+            "Run snippy variant calling"
+    ):
+        sys.exit(1)
+
+    # Step 4: Compress VCF with bgzip
+    if not run_command(["bgzip", vcf_bcf], "Compress VCF with bgzip"):
+        sys.exit(1)
+
+    # Step 5: Create index for bcftools VCF
+    if not run_command(
+            ["tabix", "-p", "vcf", vcf_bcf_gz],
+            "Create tabix index for bcftools VCF"
+    ):
+        sys.exit(1)
+
+    # Step 6: Create index for snippy VCF
+    if not run_command(
+            ["tabix", "-p", "vcf", snippy_vcf_gz],
+            "Create tabix index for snippy VCF"
+    ):
+        sys.exit(1)
+
+    # Step 7: Merge VCF files
+    if not run_command(
+            ["bcftools", "merge", vcf_bcf_gz, snippy_vcf_gz, "-Oz", "-o", merged_vcf],
+            "Merge VCF files with bcftools"
+    ):
+        sys.exit(1)
+
+    # Step 8: Extract genotypes from merged VCF
+    if not extract_genotypes(merged_vcf, merged_csv):
+        sys.exit(1)
+
+    print("Complete pipeline finished")
+
+
+if __name__ == "__main__":
+    # python pipeline_for_merging_results_from_two_variant_callers.py [sample_sheet.csv]
+    if len(sys.argv) > 1:
+        if not run_cohort(sys.argv[1]):
+            sys.exit(1)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import contextlib
+import json
+import os
+import time
+
+# VARIANT_TOOLS_TELEMETRY=summary.json     write a JSON summary of stage timers and counters
+# VARIANT_TOOLS_PROFILE=cprofile,tracemalloc   per-stage cProfile (pstats files) and peak memory
+# VARIANT_TOOLS_PROFILE_DIR=profiles        directory of the pstats files
+TELEMETRY_ENV = "VARIANT_TOOLS_TELEMETRY"
+PROFILE_ENV = "VARIANT_TOOLS_PROFILE"
+PROFILE_DIR_ENV = "VARIANT_TOOLS_PROFILE_DIR"
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Telemetry:
+
+    """named stage timers and counters with opt-in cProfile and tracemalloc capture
+        when disabled, stage() returns a shared no-op context and count() returns at once"""
+
+    def __init__(self, enabled=False, summary_file=None, cprofile=False, trace_memory=False,
+                 profile_dir="profiles"):
+        self.enabled = enabled or cprofile or trace_memory
+        self.summary_file = summary_file
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.stages = {}
+        self.start_time = time.perf_counter()
+
+    def _stage_record(self, name):
+        return self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "counters": {}})
+
+    def stage(self, name):
+
+        """time a named stage, e.g. `with telemetry.stage("perform_indels"):`"""
+
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._run_stage(name)
+
+    @contextlib.contextmanager
+    def _run_stage(self, name):
+        record = self._stage_record(name)
+
+        profiler = None
+        if self.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+
+        if self.trace_memory:
+            import tracemalloc
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["seconds"] += time.perf_counter() - start
+            record["calls"] += 1
+
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                record["peak_memory_bytes"] = max(record.get("peak_memory_bytes", 0), peak)
+                if started_tracing:
+                    tracemalloc.stop()
+
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                # one file per call, so repeated stages do not overwrite each other
+                pstats_file = os.path.join(self.profile_dir, f"{name}.{record['calls']}.pstats")
+                profiler.dump_stats(pstats_file)
+                record.setdefault("pstats", []).append(pstats_file)
+
+    def count(self, stage, counter, value=1):
+
+        """add value to a counter of a stage, e.g. reads or bytes_written"""
+
+        if not self.enabled:
+            return
+        counters = self._stage_record(stage)["counters"]
+        counters[counter] = counters.get(counter, 0) + value
+
+    def count_file_bytes(self, stage, *files):
+
+        """add the size of written files to the bytes_written counter of a stage"""
+
+        if not self.enabled:
+            return
+        for path in files:
+            if path and os.path.exists(path):
+                self.count(stage, "bytes_written", os.path.getsize(path))
+
+    def summary(self):
+
+        """stage timers, counters and counter rates per second"""
+
+        stages = {}
+        for name, record in self.stages.items():
+            stage = dict(record)
+            seconds = record["seconds"]
+            stage["rates"] = {
+                f"{counter}_per_sec": value / seconds
+                for counter, value in record["counters"].items() if seconds > 0
+            }
+            stages[name] = stage
+
+        return {
+            "total_seconds": time.perf_counter() - self.start_time,
+            "stages": stages
+        }
+
+    def write_summary(self, summary_file=None):
+        summary_file = summary_file or self.summary_file
+        if not self.enabled or not summary_file:
+            return None
+
+        with open(summary_file, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"Saved {summary_file}")
+        return summary_file
+
+
+_telemetry = None
+
+
+def configure(summary_file=None, cprofile=False, trace_memory=False, profile_dir=None):
+
+    """set up the shared telemetry from arguments, falling back to the environment variables"""
+
+    global _telemetry
+
+    summary_file = summary_file or os.environ.get(TELEMETRY_ENV) or None
+    profile = {p.strip().lower() for p in os.environ.get(PROFILE_ENV, "").split(",") if p.strip()}
+    cprofile = cprofile or "cprofile" in profile
+    trace_memory = trace_memory or "tracemalloc" in profile
+    profile_dir = profile_dir or os.environ.get(PROFILE_DIR_ENV) or "profiles"
+
+    _telemetry = Telemetry(
+        enabled=bool(summary_file),
+        summary_file=summary_file or ("telemetry.json" if cprofile or trace_memory else None),
+        cprofile=cprofile,
+        trace_memory=trace_memory,
+        profile_dir=profile_dir
+    )
+    return _telemetry
+
+
+def get_telemetry():
+
+    """get the shared telemetry, configured from the environment on first use"""
+
+    if _telemetry is None:
+        return configure()
+    return _telemetry